@@ -1,16 +1,15 @@
+import asyncio
 import os
-from enum import Enum
-import json
 import time
-from pydantic import BaseModel
+from typing import Optional
 
 from uagents import Agent, Context, Model
-from uagents.setup import fund_agent_if_low
 from uagents.experimental.quota import QuotaProtocol, RateLimit
 from uagents_core.models import ErrorMessage
 
-from chat_proto import chat_proto, struct_output_client_proto
-from defi_protocol import get_defi_protocol_info, DeFiProtocolRequest, DeFiProtocolResponse, DEFI_PROTOCOLS
+from chat_proto import chat_proto, rate_limiter, resolution_cache, restore_chat_state, session_status, session_store, struct_output_client_proto
+import knowledge_base
+from defi_protocol import get_defi_protocol_info, get_protocol_answer, get_protocol_answers, resolve_protocol_key, search_protocols, DeFiProtocolQuery, DeFiProtocolQueryResponse, DeFiProtocolRequest, DeFiProtocolResponse, ProtocolDetails
 
 # Get environment variables or use defaults
 AGENT_NAME = os.getenv("UAGENT_NAME", "emrys-defi-agent")
@@ -26,6 +25,20 @@ if not RAILWAY_URL.startswith(("http://", "https://")):
     RAILWAY_URL = f"https://{RAILWAY_URL}"
 AGENT_ENDPOINT = f"{RAILWAY_URL}/submit"
 
+# Fund the wallet and publish protocol manifests in the background once the agent
+# is already accepting messages, instead of blocking before agent.run()
+DEFERRED_STARTUP = os.getenv("DEFERRED_STARTUP", "true").lower() == "true"
+
+# How often to check the catalog sources for edits to hot-reload
+CATALOG_RELOAD_INTERVAL_SECONDS = float(os.getenv("CATALOG_RELOAD_INTERVAL_SECONDS", "10"))
+
+# Batch info requests have their own quota: each batch counts as one request against
+# BATCH_RATE_LIMIT_REQUESTS per BATCH_RATE_LIMIT_WINDOW_MINUTES, and may name at most
+# MAX_BATCH_SIZE protocols
+BATCH_RATE_LIMIT_REQUESTS = int(os.getenv("BATCH_RATE_LIMIT_REQUESTS", "10"))
+BATCH_RATE_LIMIT_WINDOW_MINUTES = int(os.getenv("BATCH_RATE_LIMIT_WINDOW_MINUTES", "60"))
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "25"))
+
 print(f"Agent endpoint configured as: {AGENT_ENDPOINT}")
 print(f"Agent will run on port: {PORT}")
 
@@ -44,7 +57,9 @@ proto = QuotaProtocol(
     default_rate_limit=RateLimit(window_size_minutes=60, max_requests=30),
 )
 
-# Create protocol info request/response models for agent messaging
+# Create protocol info request/response models for agent messaging. Peers route messages
+# by a digest of the model schema, so these are never changed; newer options get their own
+# message types below
 class ProtocolInfoRequest(Model):
     protocol_name: str
 
@@ -54,6 +69,51 @@ class ProtocolInfoResponse(Model):
     information: str
     agent_address: str
 
+# Protocol info with conditional fetch, section selection and compression
+class ProtocolInfoQuery(Model):
+    protocol_name: str
+    # Catalog version the caller already holds the answer from, if any
+    known_version: Optional[str] = None
+    # Entry sections to return, e.g. ["key_features", "learning_resources"]; all when omitted
+    sections: Optional[list[str]] = None
+    # "text" for the preformatted answer, "structured" for typed fields in details
+    format: str = "text"
+    # Compressions the requester can decode, in order of preference, e.g. ["zstd", "zlib"]
+    accept_encoding: Optional[list[str]] = None
+
+class ProtocolInfoQueryResponse(Model):
+    timestamp: int
+    protocol_name: str
+    information: str
+    agent_address: str
+    version: str
+    details: Optional[ProtocolDetails] = None
+    # Set when information holds base64 of the compressed text rather than the text itself
+    encoding: Optional[str] = None
+
+class ProtocolInfoBatchRequest(Model):
+    protocol_names: list[str]
+    sections: Optional[list[str]] = None
+    format: str = "text"
+    accept_encoding: Optional[list[str]] = None
+
+# One entry per requested name, in request order; error is set instead of
+# information when the name could not be resolved
+class ProtocolInfoBatchItem(Model):
+    protocol_name: str
+    key: Optional[str] = None
+    information: str = ""
+    details: Optional[ProtocolDetails] = None
+    encoding: Optional[str] = None
+    error: Optional[str] = None
+
+class ProtocolInfoBatchResponse(Model):
+    timestamp: int
+    version: str
+    results: list[ProtocolInfoBatchItem]
+    count: int
+    errors: int
+
 class ProtocolsListRequest(Model):
     pass
 
@@ -62,10 +122,109 @@ class ProtocolsListResponse(Model):
     protocols: dict
     count: int
 
+# Protocols list with conditional and delta fetch
+class ProtocolsListQuery(Model):
+    # Catalog version of the list the caller already holds, if any
+    known_version: Optional[str] = None
+
+class ProtocolsListQueryResponse(Model):
+    timestamp: int
+    protocols: dict
+    count: int
+    version: str
+
+# Sent instead of the full list when the caller's version is still remembered
+class ProtocolsListDelta(Model):
+    timestamp: int
+    version: str
+    base_version: str
+    added: dict
+    changed: dict
+    removed: list[str]
+
+# Sent when nothing the caller asked about changed since their version
+class CatalogNotModified(Model):
+    timestamp: int
+    version: str
+
+class ProtocolSearchRequest(Model):
+    query: str
+    top_k: int = 5
+
+class ProtocolSearchResult(Model):
+    key: str
+    name: str
+    source: str
+    score: float
+
+class ProtocolSearchResponse(Model):
+    timestamp: int
+    query: str
+    results: list[ProtocolSearchResult]
+    count: int
+
+class AgentStatusRequest(Model):
+    pass
+
+class AgentStatusResponse(Model):
+    timestamp: int
+    catalog: dict
+    sessions: dict = {}
+
+# Background startup tasks are referenced here so they are not garbage collected mid-run
+_background_tasks = set()
+
+async def run_deferred_startup(ctx: Context):
+    """Fund the agent and publish protocol manifests without delaying message handling"""
+    try:
+        # Imported here so the ledger client is only loaded when funding actually runs
+        from uagents.setup import fund_agent_if_low
+        await asyncio.to_thread(fund_agent_if_low, agent.wallet.address())
+    except Exception as err:
+        ctx.logger.error(f"Background funding check failed: {err}")
+
+    # A failed publish is logged and the remaining protocols are still published
+    for protocol in (proto, chat_proto, struct_output_client_proto):
+        try:
+            await agent.publish_manifest(protocol.manifest())
+        except Exception as err:
+            ctx.logger.error(f"Publishing the {protocol.name} manifest failed: {err}")
+
 # Define health check endpoint handler
 @agent.on_event("startup")
 async def startup(ctx: Context):
     ctx.logger.info("Agent started successfully")
+    ctx.logger.info(f"Serving catalog version {knowledge_base.current().version}")
+    restore_chat_state(ctx)
+    
+    if DEFERRED_STARTUP:
+        task = asyncio.create_task(run_deferred_startup(ctx))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+# Save state that should survive a restart
+@agent.on_event("shutdown")
+async def shutdown(ctx: Context):
+    rate_limiter.save(ctx.storage)
+    session_store.flush()
+    resolution_cache.save(ctx.storage)
+
+# Rebuild the lookup structures in the background whenever the catalog sources change
+@agent.on_interval(period=CATALOG_RELOAD_INTERVAL_SECONDS)
+async def reload_catalog(ctx: Context):
+    await knowledge_base.reload_if_changed(ctx.logger)
+
+# Define agent status endpoint handler
+@proto.on_message(AgentStatusRequest, replies={AgentStatusResponse})
+async def get_agent_status(ctx: Context, sender: str, msg: AgentStatusRequest):
+    await ctx.send(
+        sender,
+        AgentStatusResponse(
+            timestamp=int(time.time()),
+            catalog=knowledge_base.current().status(),
+            sessions=session_status()
+        )
+    )
 
 # Define protocol info endpoint handler
 @proto.on_message(ProtocolInfoRequest, replies={ProtocolInfoResponse, ErrorMessage})
@@ -87,13 +246,92 @@ async def get_protocol_info(ctx: Context, sender: str, msg: ProtocolInfoRequest)
         ctx.logger.error(f"Error retrieving protocol info: {err}")
         await ctx.send(sender, ErrorMessage(error=str(err)))
 
+# Define versioned protocol info endpoint handler
+@proto.on_message(ProtocolInfoQuery, replies={ProtocolInfoQueryResponse, CatalogNotModified, ErrorMessage})
+async def query_protocol_info(ctx: Context, sender: str, msg: ProtocolInfoQuery):
+    ctx.logger.info(f"Received protocol info query for {msg.protocol_name}")
+    try:
+        kb = knowledge_base.current()
+        
+        # Skip the answer entirely when the caller's copy of this entry is still current. The
+        # version says nothing about which sections or format the caller fetched before, so
+        # requests for anything but the full text answer are always answered
+        if msg.known_version and not msg.sections and msg.format == "text":
+            protocol_key = resolve_protocol_key(msg.protocol_name)
+            unchanged = msg.known_version == kb.version or (
+                protocol_key is not None
+                and knowledge_base.entry_unchanged_since(msg.known_version, protocol_key, kb)
+            )
+            if unchanged:
+                await ctx.send(sender, CatalogNotModified(timestamp=int(time.time()), version=kb.version))
+                return
+        
+        information, details, encoding = await get_protocol_answer(
+            msg.protocol_name, msg.sections, msg.format, msg.accept_encoding
+        )
+        ctx.logger.info(f"Retrieved information for {msg.protocol_name}")
+        
+        response = ProtocolInfoQueryResponse(
+            timestamp=int(time.time()),
+            protocol_name=msg.protocol_name,
+            information=information,
+            agent_address=agent.address,
+            version=kb.version,
+            details=details,
+            encoding=encoding
+        )
+        
+        await ctx.send(sender, response)
+    except Exception as err:
+        ctx.logger.error(f"Error retrieving protocol info: {err}")
+        await ctx.send(sender, ErrorMessage(error=str(err)))
+
+# Define batch protocol info endpoint handler
+@proto.on_message(
+    ProtocolInfoBatchRequest,
+    replies={ProtocolInfoBatchResponse, ErrorMessage},
+    rate_limit=RateLimit(
+        window_size_minutes=BATCH_RATE_LIMIT_WINDOW_MINUTES,
+        max_requests=BATCH_RATE_LIMIT_REQUESTS,
+    ),
+)
+async def get_protocol_info_batch(ctx: Context, sender: str, msg: ProtocolInfoBatchRequest):
+    ctx.logger.info(f"Received batch protocol info request for {len(msg.protocol_names)} protocols")
+    if len(msg.protocol_names) > MAX_BATCH_SIZE:
+        await ctx.send(
+            sender,
+            ErrorMessage(error=f"Batch of {len(msg.protocol_names)} names exceeds the limit of {MAX_BATCH_SIZE}")
+        )
+        return
+    try:
+        version = knowledge_base.current().version
+        results = [
+            ProtocolInfoBatchItem(**result)
+            for result in await get_protocol_answers(
+                msg.protocol_names, msg.sections, msg.format, msg.accept_encoding
+            )
+        ]
+        
+        response = ProtocolInfoBatchResponse(
+            timestamp=int(time.time()),
+            version=version,
+            results=results,
+            count=len(results),
+            errors=sum(1 for result in results if result.error is not None)
+        )
+        
+        await ctx.send(sender, response)
+    except Exception as err:
+        ctx.logger.error(f"Error retrieving batch protocol info: {err}")
+        await ctx.send(sender, ErrorMessage(error=str(err)))
+
 # Define protocols list endpoint handler
 @proto.on_message(ProtocolsListRequest, replies={ProtocolsListResponse})
 async def get_protocols_list(ctx: Context, sender: str, msg: ProtocolsListRequest):
     ctx.logger.info("Received protocols list request")
     
-    # Extract all protocols from DEFI_PROTOCOLS dictionary
-    protocols = {k: v.get("name", k) for k, v in DEFI_PROTOCOLS.items()}
+    # Protocol names are precomputed once per catalog version alongside the render cache
+    protocols = dict(knowledge_base.current().names)
     
     response = ProtocolsListResponse(
         timestamp=int(time.time()),
@@ -103,6 +341,60 @@ async def get_protocols_list(ctx: Context, sender: str, msg: ProtocolsListReques
     
     await ctx.send(sender, response)
 
+# Define versioned protocols list endpoint handler
+@proto.on_message(ProtocolsListQuery, replies={ProtocolsListQueryResponse, ProtocolsListDelta, CatalogNotModified})
+async def query_protocols_list(ctx: Context, sender: str, msg: ProtocolsListQuery):
+    ctx.logger.info("Received protocols list query")
+    kb = knowledge_base.current()
+    
+    if msg.known_version == kb.version:
+        await ctx.send(sender, CatalogNotModified(timestamp=int(time.time()), version=kb.version))
+        return
+    
+    # Callers on a version we still remember only get the entries that differ
+    changes = knowledge_base.changes_since(msg.known_version, kb) if msg.known_version else None
+    if changes is not None:
+        await ctx.send(
+            sender,
+            ProtocolsListDelta(
+                timestamp=int(time.time()),
+                version=kb.version,
+                base_version=msg.known_version,
+                **changes
+            )
+        )
+        return
+    
+    protocols = dict(kb.names)
+    
+    response = ProtocolsListQueryResponse(
+        timestamp=int(time.time()),
+        protocols=protocols,
+        count=len(protocols),
+        version=kb.version
+    )
+    
+    await ctx.send(sender, response)
+
+# Define full-text protocol search endpoint handler
+@proto.on_message(ProtocolSearchRequest, replies={ProtocolSearchResponse, ErrorMessage})
+async def search_protocol_catalog(ctx: Context, sender: str, msg: ProtocolSearchRequest):
+    ctx.logger.info(f"Received protocol search request: {msg.query}")
+    try:
+        results = [ProtocolSearchResult(**result) for result in search_protocols(msg.query, msg.top_k)]
+        
+        response = ProtocolSearchResponse(
+            timestamp=int(time.time()),
+            query=msg.query,
+            results=results,
+            count=len(results)
+        )
+        
+        await ctx.send(sender, response)
+    except Exception as err:
+        ctx.logger.error(f"Error searching protocols: {err}")
+        await ctx.send(sender, ErrorMessage(error=str(err)))
+
 # Original DeFi protocol info request handler
 @proto.on_message(
     DeFiProtocolRequest, replies={DeFiProtocolResponse, ErrorMessage}
@@ -118,17 +410,36 @@ async def handle_request(ctx: Context, sender: str, msg: DeFiProtocolRequest):
         ctx.logger.error(err)
         await ctx.send(sender, ErrorMessage(error=str(err)))
 
-# Include the protocols in the agent
-agent.include(proto, publish_manifest=True)
-agent.include(chat_proto, publish_manifest=True)
-agent.include(struct_output_client_proto, publish_manifest=True)
+# DeFi protocol info with section selection, structured details and compression
+@proto.on_message(
+    DeFiProtocolQuery, replies={DeFiProtocolQueryResponse, ErrorMessage}
+)
+async def handle_query(ctx: Context, sender: str, msg: DeFiProtocolQuery):
+    ctx.logger.info(f"Received DeFi protocol info query for {msg.protocol_name}")
+    try:
+        results, details, encoding = await get_protocol_answer(
+            msg.protocol_name, msg.sections, msg.format, msg.accept_encoding
+        )
+        ctx.logger.info(f'Retrieved information for {msg.protocol_name}')
+        await ctx.send(sender, DeFiProtocolQueryResponse(results=results, details=details, encoding=encoding))
+    except Exception as err:
+        ctx.logger.error(err)
+        await ctx.send(sender, ErrorMessage(error=str(err)))
+
+# Include the protocols in the agent; with deferred startup the manifests are
+# published from run_deferred_startup instead
+agent.include(proto, publish_manifest=not DEFERRED_STARTUP)
+agent.include(chat_proto, publish_manifest=not DEFERRED_STARTUP)
+agent.include(struct_output_client_proto, publish_manifest=not DEFERRED_STARTUP)
 
 if __name__ == "__main__":
     print(f"Starting agent with endpoint {AGENT_ENDPOINT}")
     print(f"HTTP API available at http://0.0.0.0:{PORT}")
     
     # Fund the agent if it's low on funds (optional)
-    fund_agent_if_low(agent.wallet.address())
+    if not DEFERRED_STARTUP:
+        from uagents.setup import fund_agent_if_low
+        fund_agent_if_low(agent.wallet.address())
     
     # Run the agent
     agent.run() 
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""
+Measure the bytes on the wire for every catalog entry with and without compression.
+
+Each DeFi protocol answer is serialized as a DeFiProtocolQueryResponse exactly as the agent
+sends it, once as plain text and once per supported encoding. Blockchain technology
+answers (model.get_protocol_info) are measured the same way.
+
+Run from the uagents directory:
+    python benchmarks/payload_compression.py
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import knowledge_base
+import model
+from compression import ENCODINGS, decode_payload, encode_payload
+from defi_protocol import DeFiProtocolQueryResponse
+
+def wire_bytes(text: str, encoding=None) -> int:
+    payload = text if encoding is None else encode_payload(text, encoding)
+    # Check the round trip so a size is never reported for a payload that cannot be read back
+    assert decode_payload(payload, encoding) == text
+    return len(DeFiProtocolQueryResponse(results=payload, encoding=encoding).json().encode())
+
+def main():
+    kb = knowledge_base.current()
+    answers = [(f"defi/{key}", kb.render(key)) for key in kb.protocols]
+    answers += [
+        (f"technology/{key}", asyncio.run(model.get_protocol_info(key)))
+        for key in kb.technologies
+    ]
+
+    encodings = list(ENCODINGS)
+    print(f"{'entry':<30}{'plain':>8}" + "".join(f"{encoding:>14}" for encoding in encodings))
+    totals = {encoding: 0 for encoding in [None, *encodings]}
+    for name, text in answers:
+        plain = wire_bytes(text)
+        totals[None] += plain
+        row = f"{name:<30}{plain:>8}"
+        for encoding in encodings:
+            size = wire_bytes(text, encoding)
+            totals[encoding] += size
+            row += f"{size:>7} ({1 - size / plain:>4.0%})"
+        print(row)
+
+    row = f"{'total':<30}{totals[None]:>8}"
+    for encoding in encodings:
+        row += f"{totals[encoding]:>7} ({1 - totals[encoding] / totals[None]:>4.0%})"
+    print(row)
+    if "zstd" not in ENCODINGS:
+        print("\nInstall the optional zstandard package to measure zstd as well")
+
+if __name__ == "__main__":
+    main()
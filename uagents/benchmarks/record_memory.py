@@ -0,0 +1,70 @@
+"""
+Compare the memory held by catalog entries as nested dicts and as CatalogRecord tuples.
+
+The catalog is replicated 1x, 10x and 100x under distinct keys, every copy parsed
+from the JSON sources so no strings are shared between copies by accident.
+
+Run from the uagents directory:
+    python benchmarks/record_memory.py
+"""
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import CATALOG_SOURCES
+from records import CatalogRecord
+
+SCALES = (1, 10, 100)
+
+def load_sources() -> list:
+    sources = []
+    for path in CATALOG_SOURCES.values():
+        with open(path, encoding="utf-8") as f:
+            sources.append(f.read())
+    return sources
+
+def build_dicts(sources: list, scale: int) -> dict:
+    catalog = {}
+    for copy in range(scale):
+        for source in sources:
+            for key, entry in json.loads(source).items():
+                catalog[f"{key}-{copy}"] = entry
+    return catalog
+
+def build_records(sources: list, scale: int) -> dict:
+    catalog = {}
+    for copy in range(scale):
+        for source in sources:
+            for key, entry in json.loads(source).items():
+                catalog[f"{key}-{copy}"] = CatalogRecord.from_dict(entry)
+    return catalog
+
+def retained_bytes(build, sources: list, scale: int) -> int:
+    """
+    Bytes still allocated once the catalog is built and temporary objects are freed
+    """
+    gc.collect()
+    tracemalloc.start()
+    catalog = build(sources, scale)
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del catalog
+    return retained
+
+def main():
+    sources = load_sources()
+    print(f"{'scale':<8}{'entries':>9}{'dicts (KiB)':>14}{'records (KiB)':>16}{'saving':>9}")
+    for scale in SCALES:
+        entries = len(build_dicts(sources, 1)) * scale
+        as_dicts = retained_bytes(build_dicts, sources, scale)
+        as_records = retained_bytes(build_records, sources, scale)
+        saving = 1 - as_records / as_dicts
+        print(f"{scale:<8}{entries:>9}{as_dicts / 1024:>14.1f}{as_records / 1024:>16.1f}{saving:>8.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Microbenchmark for get_defi_protocol_info before and after the render cache.
+
+Run from the uagents directory:
+    python benchmarks/render_cache.py
+"""
+import asyncio
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import CATALOG_SOURCES
+from defi_protocol import get_defi_protocol_info
+
+ITERATIONS = 2000
+
+# The original implementation worked on plain dicts loaded at import
+with open(CATALOG_SOURCES["defi"], encoding="utf-8") as f:
+    DEFI_PROTOCOLS = json.load(f)
+
+async def legacy_get_defi_protocol_info(protocol_name: str) -> str:
+    """
+    The original implementation, which rebuilds every answer on each call
+    """
+    protocol_key = protocol_name.lower()
+    if protocol_key in DEFI_PROTOCOLS:
+        protocol = DEFI_PROTOCOLS[protocol_key]
+        result = f"\n{protocol['name']} - {protocol['category']}\n"
+        if 'blockchain' in protocol:
+            result += f"Blockchain: {protocol['blockchain']}\n"
+        if 'ecosystem' in protocol:
+            result += f"Ecosystem: {protocol['ecosystem']}\n"
+        if 'launched' in protocol:
+            result += f"Launched: {protocol['launched']}\n"
+        result += f"\nDescription:\n{protocol['description']}\n\n"
+        result += "Key Features:\n"
+        for feature in protocol['key_features']:
+            result += f"- {feature}\n"
+        result += "\nTechnical Aspects:\n"
+        for aspect in protocol['technical_aspects']:
+            result += f"- {aspect}\n"
+        result += "\nLearning Resources:\n"
+        for resource in protocol['learning_resources']:
+            result += f"- {resource}\n"
+        return result
+
+    similar_protocols = []
+    search_term = protocol_key.lower()
+    for key in list(DEFI_PROTOCOLS.keys()):
+        if search_term in key or key in search_term:
+            similar_protocols.append(DEFI_PROTOCOLS.get(key, {}).get('name', key.upper()))
+    if not similar_protocols:
+        for key, proto in DEFI_PROTOCOLS.items():
+            if search_term in proto['description'].lower():
+                similar_protocols.append(proto['name'])
+    if similar_protocols:
+        return f"'{protocol_name}' not found. Did you mean one of these: {', '.join(similar_protocols)}?"
+    solana_protocols = [DEFI_PROTOCOLS[k]["name"] for k in DEFI_PROTOCOLS if DEFI_PROTOCOLS[k].get("ecosystem") == "Solana"]
+    cosmos_protocols = [DEFI_PROTOCOLS[k]["name"] for k in DEFI_PROTOCOLS if DEFI_PROTOCOLS[k].get("ecosystem") == "Cosmos"]
+    cross_protocols = [DEFI_PROTOCOLS[k]["name"] for k in DEFI_PROTOCOLS if DEFI_PROTOCOLS[k].get("ecosystem") == "Cross-Ecosystem"]
+    result = f"Information about '{protocol_name}' not found in our database. Please try one of these protocols:\n\n"
+    result += "Solana Ecosystem: " + ", ".join(solana_protocols) + "\n\n"
+    result += "Cosmos Ecosystem: " + ", ".join(cosmos_protocols) + "\n\n"
+    result += "Cross-Ecosystem: " + ", ".join(cross_protocols)
+    return result
+
+def time_per_call(lookup, names) -> float:
+    """
+    Return the mean time per lookup in microseconds
+    """
+    async def run():
+        for name in names:
+            await lookup(name)
+
+    loop = asyncio.new_event_loop()
+    try:
+        seconds = timeit.timeit(lambda: loop.run_until_complete(run()), number=ITERATIONS)
+    finally:
+        loop.close()
+    return seconds / (ITERATIONS * len(names)) * 1e6
+
+def main():
+    cases = {
+        "hit": list(DEFI_PROTOCOLS.keys()),
+        "miss": ["qwertyuiop", "not a protocol"],
+    }
+
+    print(f"{'case':<8}{'before (us)':>14}{'after (us)':>14}{'speedup':>10}")
+    for case, names in cases.items():
+        before = time_per_call(legacy_get_defi_protocol_info, names)
+        after = time_per_call(get_defi_protocol_info, names)
+        print(f"{case:<8}{before:>14.2f}{after:>14.2f}{before / after:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
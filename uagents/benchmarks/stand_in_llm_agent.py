@@ -0,0 +1,84 @@
+"""
+Local stand-in for a structured-output LLM agent, with injected latency.
+
+Answers StructuredOutputPrompt messages the way the hosted agent does, after a
+random delay: with a DeFiProtocolName-shaped output naming the first protocol or
+chain mentioned in the quoted query, or, when the prompt's schema asks for
+DeFiProtocolNames, with one name per numbered query. Run a few of them with different latencies
+and point the chat agent at them to watch prompts being hedged across the pool.
+
+Run from the uagents directory, once per stand-in:
+    python benchmarks/stand_in_llm_agent.py --port 8101 --seed fast --latency 0.5
+    python benchmarks/stand_in_llm_agent.py --port 8102 --seed slow --latency 3 --slow-fraction 0.2 --slow-latency 20
+
+Each prints its address; list them in STRUCTURED_OUTPUT_AGENT_ADDRESSES (comma-separated)
+before starting the chat agent.
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from uagents import Agent, Context, Protocol
+
+from chat_proto import StructuredOutputPrompt, StructuredOutputResponse
+from intent_resolver import find_keyword_names
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--seed", default="stand-in-llm", help="agent seed, different for each stand-in")
+    parser.add_argument("--latency", type=float, default=1.0, help="mean response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.5, help="latency varies uniformly by up to this much")
+    parser.add_argument("--slow-fraction", type=float, default=0.0, help="fraction of prompts answered with --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=20.0, help="latency of the slow prompts in seconds")
+    parser.add_argument("--drop-fraction", type=float, default=0.0, help="fraction of prompts never answered")
+    return parser.parse_args()
+
+def extract_name(query: str) -> str:
+    names = find_keyword_names(query)
+    return names[0] if names else "<UNKNOWN>"
+
+def answer(prompt: str, output_schema: dict) -> dict:
+    if "protocol_names" in output_schema.get("properties", {}):
+        # Multi-part prompts list the queries one per line as: 1. '...'
+        queries = re.findall(r"^\d+\. '(.*)'$", prompt, re.M)
+        return {"protocol_names": [extract_name(query) for query in queries]}
+    # The chat agent quotes the user's query as the first '...' in the prompt
+    match = re.search(r"'(.*?)'", prompt, re.S)
+    return {"protocol_name": extract_name(match.group(1)) if match else "<UNKNOWN>"}
+
+def main():
+    args = parse_args()
+    agent = Agent(
+        name=f"stand_in_llm_{args.seed}",
+        seed=f"stand-in-llm-agent {args.seed}",
+        port=args.port,
+        endpoint=[f"http://127.0.0.1:{args.port}/submit"],
+    )
+    proto = Protocol(name="StructuredOutputStandIn", version="0.1.0")
+
+    @proto.on_message(StructuredOutputPrompt)
+    async def handle_prompt(ctx: Context, sender: str, msg: StructuredOutputPrompt):
+        if random.random() < args.drop_fraction:
+            ctx.logger.info(f"Dropping prompt for session {ctx.session}")
+            return
+        if random.random() < args.slow_fraction:
+            delay = args.slow_latency
+        else:
+            delay = max(0.0, args.latency + random.uniform(-args.jitter, args.jitter))
+        await asyncio.sleep(delay)
+        output = answer(msg.prompt, msg.output_schema)
+        ctx.logger.info(f"Answered session {ctx.session} after {delay:.2f}s: {output}")
+        await ctx.send(sender, StructuredOutputResponse(output=output))
+
+    agent.include(proto)
+    print(f"Stand-in LLM agent address: {agent.address}")
+    agent.run()
+
+if __name__ == "__main__":
+    main()
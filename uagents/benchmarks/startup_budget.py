@@ -0,0 +1,83 @@
+"""
+Check the cold-start import time of the agent against a budget.
+
+Imports the agent module in a fresh interpreter under `python -X importtime`,
+then reports the self time spent in this repo's own modules and the total
+cumulative import time. Exits with status 1 if either is over its budget.
+
+Run from the uagents directory:
+    python benchmarks/startup_budget.py
+    python benchmarks/startup_budget.py --own-budget-ms 150 --total-budget-ms 2500
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that live in the uagents directory of this repo
+OWN_MODULES = frozenset(
+    name[:-3] for name in os.listdir(AGENT_DIR) if name.endswith(".py")
+)
+
+def measure_imports(module: str) -> list:
+    """
+    Return (module, self_us, cumulative_us) for every module imported by `import module`
+    """
+    env = dict(os.environ, PYTHONPATH=AGENT_DIR)
+    # Run from a scratch directory so the agent's key file and storage are not touched
+    with tempfile.TemporaryDirectory() as scratch:
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=scratch,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr}")
+
+    timings = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append((name.strip(), int(self_us), int(cumulative_us)))
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="agent")
+    parser.add_argument("--own-budget-ms", type=float, default=200.0)
+    parser.add_argument("--total-budget-ms", type=float, default=3000.0)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    timings = measure_imports(args.module)
+    own = [timing for timing in timings if timing[0] in OWN_MODULES]
+    own_ms = sum(self_us for _, self_us, _ in own) / 1000
+    # The requested module is the last top-level entry, its cumulative time covers everything
+    total_ms = timings[-1][2] / 1000
+
+    print("Slowest imports (self time):")
+    for name, self_us, cumulative_us in sorted(timings, key=lambda t: t[1], reverse=True)[:args.top]:
+        print(f"  {name:<50}{self_us / 1000:>10.1f} ms")
+    print("\nRepo modules:")
+    for name, self_us, cumulative_us in sorted(own, key=lambda t: t[1], reverse=True):
+        print(f"  {name:<50}{self_us / 1000:>10.1f} ms")
+
+    failed = False
+    for label, measured, budget in (
+        ("own modules", own_ms, args.own_budget_ms),
+        ("total", total_ms, args.total_budget_ms),
+    ):
+        verdict = "ok" if measured <= budget else "OVER BUDGET"
+        failed = failed or measured > budget
+        print(f"{label:<14}{measured:>10.1f} ms  (budget {budget:.0f} ms)  {verdict}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
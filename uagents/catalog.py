@@ -0,0 +1,242 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from collections import Counter
+from collections.abc import Mapping
+
+from records import CatalogRecord, CatalogSummary
+
+# The editable knowledge base lives in data/*.json and is compiled into a single
+# catalog.bin file: a header holding the offset index, per-entry summaries and
+# a table of strings shared between records and a content hash per entry,
+# followed by the encoded records.
+# At runtime the compiled file is memory-mapped and each record is decoded the
+# first time it is requested.
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CATALOG_SOURCES = {
+    "defi": os.path.join(DATA_DIR, "defi_protocols.json"),
+    "technology": os.path.join(DATA_DIR, "blockchain_technologies.json"),
+}
+COMPILED_CATALOG_PATH = os.path.join(DATA_DIR, "catalog.bin")
+
+MAGIC = b"EMRYSCAT2"
+_HEADER_LENGTH = struct.Struct("<Q")
+
+# Small fields copied into the header so names, aliases and ecosystems are
+# available for building lookup indexes without decoding any record
+SUMMARY_FIELDS = CatalogSummary._fields
+
+def source_digest(source_paths: dict = CATALOG_SOURCES) -> str:
+    """
+    Hash the catalog source files, used to detect a stale compiled catalog
+    """
+    digest = hashlib.sha256()
+    for name in sorted(source_paths):
+        digest.update(name.encode())
+        with open(source_paths[name], "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def _record_strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, list):
+        for item in value:
+            yield from _record_strings(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _record_strings(item)
+
+def _encode(value, string_ids: dict):
+    # Strings are the only scalars in the catalog, so an integer in an encoded
+    # record always refers to the shared string table
+    if isinstance(value, str):
+        return string_ids.get(value, value)
+    if isinstance(value, list):
+        return [_encode(item, string_ids) for item in value]
+    if isinstance(value, dict):
+        return {key: _encode(item, string_ids) for key, item in value.items()}
+    raise TypeError(f"Unsupported catalog value: {value!r}")
+
+def _decode(value, strings: list):
+    if isinstance(value, int):
+        return strings[value]
+    if isinstance(value, list):
+        return [_decode(item, strings) for item in value]
+    if isinstance(value, dict):
+        return {key: _decode(item, strings) for key, item in value.items()}
+    return value
+
+def entry_hash(record: dict) -> str:
+    """
+    Hash one source entry independently of the others, so an edit to one entry
+    never changes the hash of another
+    """
+    canonical = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+def compile_catalog(source_paths: dict = CATALOG_SOURCES) -> bytes:
+    """
+    Compile the JSON catalog sources into the binary catalog format
+    """
+    catalogs = {}
+    for name, path in source_paths.items():
+        with open(path, encoding="utf-8") as f:
+            catalogs[name] = json.load(f)
+
+    # Any string used by more than one record is stored once in the header
+    usage = Counter(
+        string
+        for catalog in catalogs.values()
+        for record in catalog.values()
+        for string in set(_record_strings(record))
+    )
+    shared_strings = sorted(string for string, count in usage.items() if count > 1)
+    string_ids = {string: i for i, string in enumerate(shared_strings)}
+
+    body = bytearray()
+    locations = {}
+    index = {}
+    summaries = {}
+    hashes = {}
+    for name, catalog in catalogs.items():
+        index[name] = {}
+        summaries[name] = {}
+        hashes[name] = {}
+        for key, record in catalog.items():
+            # Reject unknown or missing fields at compile time rather than on first request
+            CatalogRecord.from_dict(record)
+            encoded = json.dumps(_encode(record, string_ids), ensure_ascii=False, separators=(",", ":")).encode()
+            # Identical records (e.g. "zpl" and "zpl utxo bridge") share one copy
+            location = locations.get(encoded)
+            if location is None:
+                location = locations[encoded] = [len(body), len(encoded)]
+                body += encoded
+            index[name][key] = location
+            summaries[name][key] = {field: record[field] for field in SUMMARY_FIELDS if field in record}
+            hashes[name][key] = entry_hash(record)
+
+    header = json.dumps({
+        "source_digest": source_digest(source_paths),
+        "strings": shared_strings,
+        "index": index,
+        "summaries": summaries,
+        "hashes": hashes,
+    }, ensure_ascii=False, separators=(",", ":")).encode()
+    return MAGIC + _HEADER_LENGTH.pack(len(header)) + header + bytes(body)
+
+class CompiledCatalog:
+    """
+    Read-only view over a compiled catalog buffer that decodes records on first access
+    """
+
+    def __init__(self, buffer):
+        if buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a compiled protocol catalog")
+        header_start = len(MAGIC) + _HEADER_LENGTH.size
+        (header_length,) = _HEADER_LENGTH.unpack(buffer[len(MAGIC):header_start])
+        header = json.loads(buffer[header_start:header_start + header_length])
+
+        self._buffer = buffer
+        self._body_start = header_start + header_length
+        self._strings = header["strings"]
+        self._index = header["index"]
+        self._summaries = {
+            catalog: {key: CatalogSummary.from_dict(summary) for key, summary in summaries.items()}
+            for catalog, summaries in header["summaries"].items()
+        }
+        self._hashes = header["hashes"]
+        self._decoded = {}
+        self.source_digest = header["source_digest"]
+
+    def record(self, catalog: str, key: str) -> CatalogRecord:
+        offset, length = self._index[catalog][key]
+        record = self._decoded.get(offset)
+        if record is None:
+            start = self._body_start + offset
+            record = CatalogRecord.from_dict(_decode(json.loads(self._buffer[start:start + length]), self._strings))
+            self._decoded[offset] = record
+        return record
+
+    def records(self, catalog: str) -> "LazyRecords":
+        return LazyRecords(self, catalog)
+
+    def summaries(self, catalog: str) -> dict:
+        return self._summaries[catalog]
+
+    def entry_hashes(self, catalog: str) -> dict:
+        return self._hashes[catalog]
+
+    def keys(self, catalog: str):
+        return self._index[catalog].keys()
+
+class LazyRecords(Mapping):
+    """
+    Mapping of key to catalog entry, decoding each entry the first time it is read
+    """
+
+    def __init__(self, catalog: CompiledCatalog, name: str):
+        self._catalog = catalog
+        self._name = name
+
+    def __getitem__(self, key: str) -> CatalogRecord:
+        if key not in self._catalog.keys(self._name):
+            raise KeyError(key)
+        return self._catalog.record(self._name, key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._catalog.keys(self._name)
+
+    def __iter__(self):
+        return iter(self._catalog.keys(self._name))
+
+    def __len__(self) -> int:
+        return len(self._catalog.keys(self._name))
+
+def _map_file(path: str):
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def write_catalog(compiled: bytes, path: str = COMPILED_CATALOG_PATH):
+    """
+    Write a compiled catalog through a temporary file renamed over the old one, so a
+    running agent that has the old file memory-mapped keeps reading intact data
+    """
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, "wb") as f:
+            f.write(compiled)
+        os.replace(temporary_path, path)
+    except OSError:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+def load_catalog(path: str = COMPILED_CATALOG_PATH, source_paths: dict = CATALOG_SOURCES) -> CompiledCatalog:
+    """
+    Memory-map the compiled catalog, recompiling it first if it is missing or older than its sources
+    """
+    sources_present = all(os.path.isfile(source) for source in source_paths.values())
+    if os.path.isfile(path):
+        try:
+            catalog = CompiledCatalog(_map_file(path))
+        except ValueError:
+            # Compiled by an older version of the format, rebuild it below
+            catalog = None
+        if catalog is not None and (not sources_present or catalog.source_digest == source_digest(source_paths)):
+            return catalog
+
+    compiled = compile_catalog(source_paths)
+    try:
+        write_catalog(compiled, path)
+    except OSError:
+        # Read-only deployments still work, just without the shared mapping
+        return CompiledCatalog(compiled)
+    return CompiledCatalog(_map_file(path))
+
+if __name__ == "__main__":
+    compiled = compile_catalog()
+    write_catalog(compiled)
+    print(f"Compiled catalog written to {COMPILED_CATALOG_PATH} ({len(compiled)} bytes)")
@@ -1,6 +1,7 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from uuid import uuid4
 from typing import Any
+import os
 import time
 
 from uagents import Context, Model, Protocol
@@ -15,7 +16,14 @@ from uagents_core.contrib.protocols.chat import (
     chat_protocol_spec,
 )
 
-from defi_protocol import get_defi_protocol_info, DeFiProtocolRequest
+from defi_protocol import get_defi_protocol_info, DeFiProtocolName, DeFiProtocolNames, render_protocol_chunks, render_protocol_info, resolve_protocol_key
+from intent_resolver import find_keyword_names, resolve_query_best_effort, resolve_query_locally
+from circuit_breaker import CircuitBreaker
+from hedging import HedgedRequests
+from knowledge_base import normalize_text
+from rate_limiter import RateLimiter
+from resolution_cache import ResolutionCache
+from sessions import InFlightQueries, PendingSessions, SessionStore
 
 # OpenAI LLM Agent address for structured output
 OPENAI_AGENT_ADDRESS = 'agent1q0h70caed8ax769shpemapzkyk65uscw4xwk6dc4t3emvp5jdcvqs9xs32y'
@@ -26,28 +34,81 @@ if not OPENAI_AGENT_ADDRESS:
 # Configuration constants
 RESPONSE_TIMEOUT_SECONDS = 15  # Time to wait for OpenAI response before providing fallback
 
-# Rate limiting implementation
-class RateLimiter:
-    def __init__(self, requests_per_hour=6):
-        self.requests_per_hour = requests_per_hour
-        self.request_times = []
-        
-    async def check_rate_limit(self, ctx: Context) -> bool:
-        """Check if we're within rate limits (6 requests per hour)"""
-        current_time = time.time()
-        # Remove requests older than 1 hour
-        self.request_times = [t for t in self.request_times if current_time - t < 3600]
-        
-        if len(self.request_times) >= self.requests_per_hour:
-            ctx.logger.warning(f"Rate limit exceeded: {len(self.request_times)} requests in the last hour")
-            return False
-        
-        # Add current request time
-        self.request_times.append(current_time)
-        return True
+# Structured-output agents prompts are sent to, comma-separated. A prompt goes to one of them
+# and is hedged to the next if no response arrives within the observed latency percentile
+STRUCTURED_OUTPUT_AGENT_ADDRESSES = [
+    address.strip()
+    for address in os.getenv("STRUCTURED_OUTPUT_AGENT_ADDRESSES", OPENAI_AGENT_ADDRESS).split(",")
+    if address.strip()
+]
+HEDGE_LATENCY_PERCENTILE = float(os.getenv("HEDGE_LATENCY_PERCENTILE", "0.95"))
+# Hedge delay used until enough responses have been timed
+HEDGE_INITIAL_DELAY_SECONDS = float(os.getenv("HEDGE_INITIAL_DELAY_SECONDS", "4"))
+# Send protocol answers as several chat messages, header and description first, so chat
+# UIs can show the start of a long entry before the rest is delivered
+STREAM_CHAT_ANSWERS = os.getenv("STREAM_CHAT_ANSWERS", "true").lower() == "true"
+
+# Chat queries allowed per sender per hour, and how many senders are tracked at most
+CHAT_RATE_LIMIT_PER_HOUR = int(os.getenv("CHAT_RATE_LIMIT_PER_HOUR", "6"))
+RATE_LIMIT_MAX_SENDERS = int(os.getenv("RATE_LIMIT_MAX_SENDERS", "10000"))
+# Keep rate-limit windows in agent storage so a restart does not reset them
+RATE_LIMIT_PERSIST = os.getenv("RATE_LIMIT_PERSIST", "false").lower() == "true"
+RATE_LIMIT_SAVE_INTERVAL_SECONDS = 30.0
 
 # Initialize rate limiter
-rate_limiter = RateLimiter()
+rate_limiter = RateLimiter(
+    requests_per_hour=CHAT_RATE_LIMIT_PER_HOUR,
+    max_senders=RATE_LIMIT_MAX_SENDERS,
+    storage_key="chat_rate_limits" if RATE_LIMIT_PERSIST else None,
+)
+
+# Sessions waiting on the LLM, each with a timer that sends the fallback response
+pending_sessions = PendingSessions()
+
+# Session state is dropped once a session ends or has been idle this long
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+# How often expired sessions are compacted, and how many sessions or keys each pass handles
+SESSION_COMPACTION_INTERVAL_SECONDS = float(os.getenv("SESSION_COMPACTION_INTERVAL_SECONDS", "60"))
+SESSION_COMPACTION_BATCH = 100
+# How often buffered session state is written to storage, the most a crash can lose
+SESSION_FLUSH_INTERVAL_SECONDS = float(os.getenv("SESSION_FLUSH_INTERVAL_SECONDS", "2"))
+
+# Prompts sent across the structured-output agent pool, first response per session wins
+structured_output_pool = HedgedRequests(
+    STRUCTURED_OUTPUT_AGENT_ADDRESSES,
+    percentile=HEDGE_LATENCY_PERCENTILE,
+    initial_delay=HEDGE_INITIAL_DELAY_SECONDS,
+    # Leave time for a hedged prompt to be answered before the fallback response
+    max_delay=RESPONSE_TIMEOUT_SECONDS / 2,
+)
+
+# Consecutive LLM timeouts or error responses that open the circuit, and how long it stays
+# open before a probe prompt is sent to check whether the LLM has recovered
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "3"))
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+
+# While the circuit is open, chat queries are answered from the catalog without waiting on the LLM
+llm_circuit = CircuitBreaker(
+    "structured-output",
+    failure_threshold=LLM_CIRCUIT_FAILURE_THRESHOLD,
+    reset_seconds=LLM_CIRCUIT_RESET_SECONDS,
+)
+
+# Queries waiting on the LLM, so identical queries share one prompt and response
+in_flight_queries = InFlightQueries(max_age_seconds=RESPONSE_TIMEOUT_SECONDS)
+
+# Chat session state, kept in memory and written to storage in batches
+session_store = SessionStore(ttl_seconds=SESSION_TTL_SECONDS)
+
+# Protocol names the LLM extracted for past queries, reused instead of asking again
+RESOLUTION_CACHE_SIZE = int(os.getenv("RESOLUTION_CACHE_SIZE", "1000"))
+RESOLUTION_CACHE_TTL_SECONDS = float(os.getenv("RESOLUTION_CACHE_TTL_SECONDS", "86400"))
+RESOLUTION_CACHE_SAVE_INTERVAL_SECONDS = 30.0
+
+resolution_cache = ResolutionCache(
+    max_entries=RESOLUTION_CACHE_SIZE,
+    ttl_seconds=RESOLUTION_CACHE_TTL_SECONDS,
+)
 
 def create_text_chat(text: str, end_session: bool = True) -> ChatMessage:
     content = [TextContent(type="text", text=text)]
@@ -59,6 +120,17 @@ def create_text_chat(text: str, end_session: bool = True) -> ChatMessage:
         content=content,
     )
 
+async def send_protocol_answer(ctx: Context, recipient: str, protocol_key: str):
+    """Send the answer for a protocol, streamed in chunks unless streaming is disabled"""
+    if not STREAM_CHAT_ANSWERS:
+        await ctx.send(recipient, create_text_chat(render_protocol_info(protocol_key)))
+        return
+
+    chunks = render_protocol_chunks(protocol_key)
+    for i, chunk in enumerate(chunks):
+        # Only the final chunk ends the session
+        await ctx.send(recipient, create_text_chat(chunk.strip("\n"), end_session=i == len(chunks) - 1))
+
 
 chat_proto = Protocol(spec=chat_protocol_spec)
 struct_output_client_proto = Protocol(
@@ -77,13 +149,15 @@ class StructuredOutputResponse(Model):
 
 @chat_proto.on_message(ChatMessage)
 async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
-    ctx.logger.info(f"Got a message from {sender}: {msg.content[0].text}")
-    ctx.storage.set(str(ctx.session), sender)
+    ctx.logger.info(f"Got a message from {sender} with {', '.join(item.type for item in msg.content)} content")
+    session_store.attach(ctx.storage)
+    session_store.set(str(ctx.session), sender=sender)
     await ctx.send(
         sender,
         ChatAcknowledgement(timestamp=datetime.utcnow(), acknowledged_msg_id=msg.msg_id),
     )
 
+    texts_handled = False
     for item in msg.content:
         if isinstance(item, StartSessionContent):
             ctx.logger.info(f"Got a start session message from {sender}")
@@ -95,38 +169,71 @@ async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
                 )
             )
         elif isinstance(item, TextContent):
-            ctx.logger.info(f"Got a message from {sender}: {item.text}")
+            # Every text part of the message is answered together when the first one is reached
+            if texts_handled:
+                continue
+            texts_handled = True
+            texts = [part.text for part in msg.content if isinstance(part, TextContent)]
+            ctx.logger.info(f"Got a message from {sender}: {' | '.join(texts)}")
             
-            # Check rate limits before proceeding
-            if not await rate_limiter.check_rate_limit(ctx):
+            # Check rate limits before proceeding, once for the whole message
+            if not await rate_limiter.check_rate_limit(ctx, sender):
                 await ctx.send(
                     sender,
                     create_text_chat(
-                        "Sorry, we've reached our query limit (6 requests per hour). Please try again later."
+                        f"Sorry, you've reached the query limit ({rate_limiter.requests_per_hour} requests per hour). Please try again later."
                     )
                 )
                 continue
                 
-            ctx.storage.set(str(ctx.session), sender)
-            ctx.storage.set(f"{str(ctx.session)}_query", item.text)
+            if len(texts) > 1:
+                await handle_multi_part_query(ctx, sender, texts)
+                continue
+                
+            session_store.set(str(ctx.session), sender=sender, query=item.text, queries=None, parts=None)
+            
+            # Answer straight from the catalog when the query names exactly one protocol
+            local_key = resolve_query_locally(item.text)
+            if local_key is not None:
+                ctx.logger.info(f"Resolved query locally to protocol: {local_key}")
+                session_store.set(str(ctx.session), extracted_protocol=local_key, success=True)
+                await send_protocol_answer(ctx, sender, local_key)
+                continue
             
-            # Record the time we sent the request to OpenAI
-            request_time = datetime.utcnow()
-            ctx.storage.set(f"{str(ctx.session)}_request_time", request_time.isoformat())
+            # Reuse the LLM's answer to an earlier identical query
+            cached_name = resolution_cache.get(item.text)
+            cached_key = resolve_protocol_key(cached_name) if cached_name is not None else None
+            if cached_key is not None:
+                ctx.logger.info(f"Resolved query from cache to protocol: {cached_key}")
+                session_store.set(str(ctx.session), extracted_protocol=cached_name, success=True)
+                await send_protocol_answer(ctx, sender, cached_key)
+                continue
             
             # Schedule a fallback response in case OpenAI doesn't respond in time
-            ctx.storage.set(f"{str(ctx.session)}_fallback_scheduled", "true")
+            pending_sessions.add(
+                str(ctx.session),
+                time.time() + RESPONSE_TIMEOUT_SECONDS,
+                lambda session_id: send_fallback_response(ctx, session_id),
+            )
+            
+            # Identical queries already waiting on the LLM share its response
+            if not in_flight_queries.join(normalize_text(item.text), str(ctx.session), ctx):
+                ctx.logger.info("Same query already sent to the LLM, waiting on its response")
+                continue
             
-            # Add to active sessions list
-            active_sessions = ctx.storage.get("active_sessions") or ""
-            session_ids = [s.strip() for s in active_sessions.split(",") if s.strip()]
-            if str(ctx.session) not in session_ids:
-                session_ids.append(str(ctx.session))
-                ctx.storage.set("active_sessions", ",".join(session_ids))
+            # The LLM keeps failing, answer from the catalog right away instead of waiting on it.
+            # Checked only here, where the prompt would be sent, so a half-open probe is never
+            # used up by a session that would only wait on another one.
+            if not llm_circuit.allow_request(ctx):
+                in_flight_queries.abandon(str(ctx.session))
+                pending_sessions.remove(str(ctx.session))
+                await answer_without_llm(ctx, sender, str(ctx.session), item.text)
+                continue
             
-            # Send to OpenAI LLM for processing with structured output
-            await ctx.send(
-                OPENAI_AGENT_ADDRESS,
+            # Send to the structured-output agents for processing, hedged across the pool
+            await structured_output_pool.send(
+                ctx,
+                str(ctx.session),
                 StructuredOutputPrompt(
                     prompt=f"""Analyze this user query about blockchain technology: '{item.text}'
                     
@@ -141,15 +248,112 @@ Available technologies include:
 - Cosmos protocols: Osmosis, Astroport, Mars, Neutron
 - Cross-ecosystem: Wormhole, Pyth, LayerZero
 
-The response should be formatted to match the DeFiProtocolRequest schema with a protocol_name field containing just the name of the protocol or technology.
+The response should be formatted to match the DeFiProtocolName schema with a protocol_name field containing just the name of the protocol or technology.
 """,
-                    output_schema=DeFiProtocolRequest.schema()
+                    output_schema=DeFiProtocolName.schema()
                 ),
             )
+        elif isinstance(item, EndSessionContent):
+            # The user closed the session, nothing stored for it is needed any more once
+            # a query still waiting on the LLM has been answered or has timed out
+            ctx.logger.info(f"Got an end session message from {sender}")
+            if str(ctx.session) in pending_sessions:
+                session_store.set(str(ctx.session), end_after_reply=True)
+            else:
+                session_store.end(str(ctx.session))
         else:
             ctx.logger.info(f"Got unexpected content from {sender}")
 
 
+async def handle_multi_part_query(ctx: Context, sender: str, texts: list):
+    """
+    Answer every text part of one chat message in a single combined reply. Parts
+    resolved locally or from cache need no LLM call; the rest are sent to the LLM
+    together in one prompt asking for an array of protocol names.
+    """
+    session_id = str(ctx.session)
+    session_store.set(session_id, sender=sender, query="\n".join(texts), queries=texts)
+
+    parts = []
+    for text in texts:
+        key = resolve_query_locally(text)
+        if key is None:
+            cached_name = resolution_cache.get(text)
+            key = resolve_protocol_key(cached_name) if cached_name is not None else None
+        parts.append(key)
+    unresolved = [text for text, key in zip(texts, parts) if key is None]
+
+    if not unresolved:
+        ctx.logger.info(f"Resolved all {len(texts)} queries without the LLM")
+        session_store.set(session_id, extracted_protocol=", ".join(parts), success=True, parts=None)
+        await send_combined_answer(ctx, sender, texts, parts)
+        return
+
+    session_store.set(session_id, parts=parts)
+    pending_sessions.add(
+        session_id,
+        time.time() + RESPONSE_TIMEOUT_SECONDS,
+        lambda session_id: send_fallback_response(ctx, session_id),
+    )
+
+    # Keyed apart from single queries, whose prompt expects a different output
+    if not in_flight_queries.join("\n".join(["batch", *map(normalize_text, unresolved)]), session_id, ctx):
+        ctx.logger.info("Same queries already sent to the LLM, waiting on its response")
+        return
+
+    # The LLM keeps failing, answer every part from the catalog right away
+    if not llm_circuit.allow_request(ctx):
+        in_flight_queries.abandon(session_id)
+        pending_sessions.remove(session_id)
+        parts = [key or resolve_query_best_effort(text) for text, key in zip(texts, parts)]
+        session_store.set(session_id, parts=None)
+        await send_combined_answer(ctx, sender, texts, parts)
+        return
+
+    queries = "\n".join(f"{i}. '{text}'" for i, text in enumerate(unresolved, 1))
+    await structured_output_pool.send(
+        ctx,
+        session_id,
+        StructuredOutputPrompt(
+            prompt=f"""Analyze these {len(unresolved)} user queries about blockchain technology:
+{queries}
+
+For each query, in order, extract the specific DeFi protocol or blockchain technology the user is asking about. Return exactly one name per query.
+
+If a query mentions multiple technologies, select the primary one that seems to be the main focus.
+If a query doesn't mention any specific technology, use <UNKNOWN> for it.
+
+Available technologies include:
+- Core technologies: SOON SVM, IBC, Walrus Storage, ZPL UTXO Bridge
+- Solana protocols: Solend, Orca, Raydium, Serum, Marinade, Jito, Jupiter, Mango, Drift
+- Cosmos protocols: Osmosis, Astroport, Mars, Neutron
+- Cross-ecosystem: Wormhole, Pyth, LayerZero
+
+The response should be formatted to match the DeFiProtocolNames schema with a protocol_names array containing just the name of the protocol or technology for each query.
+""",
+            output_schema=DeFiProtocolNames.schema()
+        ),
+    )
+
+
+async def send_combined_answer(ctx: Context, recipient: str, queries: list, keys: list, names: list = None):
+    """
+    Answer every part of a multi-part query in one chat message, from the protocol key
+    resolved for each part or, failing that, the name the LLM extracted for it
+    """
+    answers = []
+    for i, (query, key) in enumerate(zip(queries, keys)):
+        name = names[i] if names and i < len(names) else None
+        if key is not None:
+            answers.append(render_protocol_info(key))
+        elif name and "<UNKNOWN>" not in name:
+            answers.append(await get_defi_protocol_info(name))
+        else:
+            answers.append(f"I couldn't identify a specific protocol or technology in '{query}'.")
+    # Parts asking about the same protocol share one answer
+    await ctx.send(recipient, create_text_chat("\n\n---\n\n".join(dict.fromkeys(answer.strip() for answer in answers))))
+
+
 @chat_proto.on_message(ChatAcknowledgement)
 async def handle_ack(ctx: Context, sender: str, msg: ChatAcknowledgement):
     ctx.logger.info(
@@ -161,7 +365,33 @@ async def handle_ack(ctx: Context, sender: str, msg: ChatAcknowledgement):
 async def handle_structured_output_response(
     ctx: Context, sender: str, msg: StructuredOutputResponse
 ):
-    session_sender = ctx.storage.get(str(ctx.session))
+    # Hedged prompts can be answered by several agents, only the first response is used, and
+    # a response arriving after the fallback was sent neither answers nor counts as a success
+    if not structured_output_pool.accept(str(ctx.session), sender):
+        ctx.logger.info(f"Dropping duplicate or late structured output from {sender} for session {ctx.session}")
+        return
+    if "error" in str(msg.output).lower():
+        llm_circuit.record_failure(ctx)
+    else:
+        llm_circuit.record_success(ctx)
+    session_store.attach(ctx.storage)
+    # One response answers the session that asked and every session waiting on the same query,
+    # each through the context of its own chat message so the answer goes out in its session
+    waiters = in_flight_queries.complete(str(ctx.session))
+    for session_id, session_ctx in {str(ctx.session): ctx, **waiters}.items():
+        await deliver_structured_output(session_ctx, session_id, msg.output)
+        end_session_if_requested(session_id)
+
+
+def end_session_if_requested(session_id: str):
+    """Forget a session the user ended while its query was still waiting on the LLM"""
+    if session_store.get(session_id, "end_after_reply"):
+        session_store.end(session_id)
+
+
+async def deliver_structured_output(ctx: Context, session_id: str, output: dict):
+    """Answer one chat session from the protocol name the LLM extracted"""
+    session_sender = session_store.get(session_id, "sender")
     if session_sender is None:
         ctx.logger.error(
             "Discarding message because no session sender found in storage"
@@ -169,26 +399,24 @@ async def handle_structured_output_response(
         return
 
     # Cancel the fallback response since we got a response from OpenAI
-    ctx.storage.set(f"{str(ctx.session)}_fallback_scheduled", "false")
-    
-    # Remove from active sessions
-    active_sessions = ctx.storage.get("active_sessions") or ""
-    session_ids = [s.strip() for s in active_sessions.split(",") if s.strip()]
-    if str(ctx.session) in session_ids:
-        session_ids.remove(str(ctx.session))
-        ctx.storage.set("active_sessions", ",".join(session_ids))
-
-    original_query = ctx.storage.get(f"{str(ctx.session)}_query") or "unknown query"
+    pending_sessions.remove(session_id)
+
+    original_query = session_store.get(session_id, "query") or "unknown query"
     ctx.logger.info(f"Processing structured output for query: {original_query}")
 
     # Store response for analytics and debugging
-    ctx.storage.set(f"{str(ctx.session)}_openai_response", str(msg.output))
+    session_store.set(session_id, openai_response=str(output))
 
-    if "<UNKNOWN>" in str(msg.output) or "error" in str(msg.output).lower():
+    parts = session_store.get(session_id, "parts")
+    if parts is not None:
+        await deliver_protocol_names(ctx, session_id, session_sender, parts, output)
+        return
+
+    if "<UNKNOWN>" in str(output) or "error" in str(output).lower():
         error_message = "I couldn't identify a specific protocol or technology in your question"
         
-        if "error" in str(msg.output).lower():
-            ctx.logger.error(f"OpenAI error: {str(msg.output)}")
+        if "error" in str(output).lower():
+            ctx.logger.error(f"OpenAI error: {str(output)}")
             error_message = "Sorry, the AI service is currently experiencing issues. Please try again later."
         
         await ctx.send(
@@ -200,12 +428,12 @@ async def handle_structured_output_response(
         return
 
     try:
-        prompt = DeFiProtocolRequest.parse_obj(msg.output)
+        prompt = DeFiProtocolName.parse_obj(output)
         extracted_name = prompt.protocol_name.strip()
         ctx.logger.info(f"Extracted protocol name: {extracted_name}")
         
         # Store the extracted protocol name for analytics
-        ctx.storage.set(f"{str(ctx.session)}_extracted_protocol", extracted_name)
+        session_store.set(session_id, extracted_protocol=extracted_name)
         
         if not extracted_name:
             raise ValueError("Empty protocol name extracted")
@@ -233,92 +461,149 @@ async def handle_structured_output_response(
         return
 
     # Store successful result for analytics
-    ctx.storage.set(f"{str(ctx.session)}_success", "true")
+    session_store.set(session_id, success=True)
+    
+    protocol_key = resolve_protocol_key(extracted_name)
+    if protocol_key is not None:
+        # Only names that resolve to a catalog entry are worth answering from cache
+        if original_query != "unknown query":
+            resolution_cache.put(original_query, extracted_name)
+        await send_protocol_answer(ctx, session_sender, protocol_key)
+        return
     
     chat_message = create_text_chat(protocol_info)
     await ctx.send(session_sender, chat_message)
 
 
-# Periodic task to check for timeout and send fallback responses
-@chat_proto.on_interval(period=5.0)  # Check every 5 seconds
-async def check_for_timeouts(ctx: Context):
-    """Check for requests that haven't received a response within the timeout period"""
-    now = datetime.utcnow()
-    
+async def deliver_protocol_names(ctx: Context, session_id: str, session_sender: str, parts: list, output: dict):
+    """Answer a multi-part chat message from the array of protocol names the LLM extracted"""
+    names = output.get("protocol_names")
+    if not isinstance(names, list):
+        ctx.logger.error(f"Expected protocol names from the LLM, got: {output}")
+        names = []
+    queries = session_store.get(session_id, "queries") or []
+
+    # The LLM answered only the parts that were not resolved before the prompt, in order
+    llm_names = iter(names)
+    part_names = []
+    keys = []
+    for query, key in zip(queries, parts):
+        name = next(llm_names, None) if key is None else None
+        if name is not None:
+            name = str(name).strip()
+            key = resolve_protocol_key(name)
+            if key is not None:
+                resolution_cache.put(query, name)
+        part_names.append(name)
+        keys.append(key)
+
+    ctx.logger.info(f"Extracted protocol names: {names}")
+    session_store.set(session_id, extracted_protocol=", ".join(k for k in keys if k), success=any(keys), parts=None)
+    await send_combined_answer(ctx, session_sender, queries, keys, part_names)
+
+
+# Periodically save rate-limit windows when persistence is enabled
+@chat_proto.on_interval(period=RATE_LIMIT_SAVE_INTERVAL_SECONDS)
+async def save_rate_limits(ctx: Context):
+    rate_limiter.save(ctx.storage)
+
+
+async def send_fallback_response(ctx: Context, session_id: str):
+    """Send a fallback response for a session whose LLM response did not arrive in time"""
     try:
-        # Instead of trying to iterate through all keys, we'll check for requests
-        # that have set a specific identifier when they were scheduled
-        active_sessions = ctx.storage.get("active_sessions") or ""
-        session_ids = [s.strip() for s in active_sessions.split(",") if s.strip()]
+        ctx.logger.warning(f"Request timeout for session {session_id}. Sending fallback response.")
+        in_flight_queries.abandon(session_id)
+        # Only the session that sent the prompt counts as an LLM failure, not those waiting on it
+        if structured_output_pool.abandon(session_id):
+            llm_circuit.record_failure(ctx)
+        
+        # Get the session sender and original query
+        session_sender = session_store.get(session_id, "sender")
+        original_query = session_store.get(session_id, "query") or "unknown query"
         
-        for session_id in session_ids:
-            fallback_scheduled = ctx.storage.get(f"{session_id}_fallback_scheduled")
+        if session_sender:
+            # Mark as processed
+            session_store.set(session_id, fallback_sent=True)
             
-            if fallback_scheduled != "true":
-                continue  # Skip if fallback not scheduled or already processed
-                
-            # Get the timestamp of the request
-            request_time_str = ctx.storage.get(f"{session_id}_request_time")
-            if not request_time_str:
-                continue
-                
-            try:
-                request_time = datetime.fromisoformat(request_time_str)
-                time_elapsed = now - request_time
-            except ValueError:
-                ctx.logger.error(f"Invalid timestamp format: {request_time_str}")
-                continue
+            # Try to extract potential keywords from the query
+            keywords = extract_potential_keywords(original_query)
             
-            # If we've waited longer than the timeout, send a fallback response
-            if time_elapsed > timedelta(seconds=RESPONSE_TIMEOUT_SECONDS):
-                ctx.logger.warning(f"Request timeout for session {session_id}. Sending fallback response.")
-                
-                # Get the session sender and original query
-                session_sender = ctx.storage.get(session_id)
-                original_query = ctx.storage.get(f"{session_id}_query") or "unknown query"
+            if keywords:
+                fallback = f"I'm currently having trouble with my AI service. Based on your query about '{keywords}', you might want to check our documentation or try asking about specific protocols like Solend, Orca, or our core technologies like SOON SVM or Walrus Storage."
+            else:
+                fallback = "I'm currently having trouble with my AI service. Please try again later or ask about a specific protocol or technology by name."
                 
-                if session_sender:
-                    # Mark as processed
-                    ctx.storage.set(f"{session_id}_fallback_scheduled", "false")
-                    ctx.storage.set(f"{session_id}_fallback_sent", "true")
-                    
-                    # Try to extract potential keywords from the query
-                    keywords = extract_potential_keywords(original_query)
-                    
-                    if keywords:
-                        fallback = f"I'm currently having trouble with my AI service. Based on your query about '{keywords}', you might want to check our documentation or try asking about specific protocols like Solend, Orca, or our core technologies like SOON SVM or Walrus Storage."
-                    else:
-                        fallback = "I'm currently having trouble with my AI service. Please try again later or ask about a specific protocol or technology by name."
-                        
-                    await ctx.send(
-                        session_sender,
-                        create_text_chat(fallback)
-                    )
-                    
-                    # Remove from active sessions
-                    updated_sessions = [s for s in session_ids if s != session_id]
-                    ctx.storage.set("active_sessions", ",".join(updated_sessions))
+            await ctx.send(
+                session_sender,
+                create_text_chat(fallback)
+            )
+        end_session_if_requested(session_id)
     except Exception as e:
-        ctx.logger.error(f"Error in timeout checker: {e}")
+        ctx.logger.error(f"Error sending fallback response: {e}")
+
+
+async def answer_without_llm(ctx: Context, sender: str, session_id: str, query: str):
+    """Answer a query from the catalog alone while the LLM circuit is open"""
+    protocol_key = resolve_query_best_effort(query)
+    if protocol_key is None:
+        await send_fallback_response(ctx, session_id)
+        return
+    ctx.logger.info(f"LLM circuit open, answering from the catalog with protocol: {protocol_key}")
+    session_store.set(session_id, extracted_protocol=protocol_key, success=True)
+    await send_protocol_answer(ctx, sender, protocol_key)
+
+
+# Incrementally drop expired sessions and legacy per-session storage keys
+@chat_proto.on_interval(period=SESSION_COMPACTION_INTERVAL_SECONDS)
+async def compact_sessions(ctx: Context):
+    session_store.attach(ctx.storage)
+    removed = session_store.compact(
+        SESSION_COMPACTION_BATCH, keep=lambda session_id: session_id in pending_sessions
+    )
+    if removed:
+        ctx.logger.info(f"Removed {removed} expired sessions and session keys")
+
+
+# Save the resolution cache so a restart can warm it from the most frequent queries
+@chat_proto.on_interval(period=RESOLUTION_CACHE_SAVE_INTERVAL_SECONDS)
+async def save_resolution_cache(ctx: Context):
+    resolution_cache.save(ctx.storage)
+
+
+# Write buffered session state to storage in one batch
+@chat_proto.on_interval(period=SESSION_FLUSH_INTERVAL_SECONDS)
+async def flush_sessions(ctx: Context):
+    session_store.flush()
+
+
+def session_status() -> dict:
+    """Pending sessions, LLM and storage size figures for the agent status response"""
+    return {
+        "pending": len(pending_sessions),
+        **session_store.metrics(),
+        **in_flight_queries.metrics(),
+        "resolution_cache": resolution_cache.metrics(),
+        "structured_output": structured_output_pool.metrics(),
+        "llm_circuit": llm_circuit.metrics(),
+    }
+
+
+def restore_chat_state(ctx: Context):
+    """Load saved sessions and the resolution cache at startup"""
+    session_store.attach(ctx.storage)
+    resolution_cache.load(ctx.storage)
+    # The startup context is outside every chat session, so fallbacks for sessions left
+    # pending by an earlier run could not reach their users there. An LLM response that
+    # still arrives for one of them is answered in its own session as usual.
+    discarded = PendingSessions.discard_saved(ctx.storage)
+    if discarded:
+        ctx.logger.info(f"Dropped the fallback timers of {discarded} chat sessions pending before the restart")
 
 
 def extract_potential_keywords(query: str) -> str:
     """Extract potential keywords from a query to provide a more helpful fallback response"""
-    # List of known important keywords to look for
-    important_terms = [
-        "SOON", "SVM", "IBC", "Walrus", "Storage", "ZPL", "UTXO", "Bridge",
-        "Solana", "Cosmos", "Bitcoin", "Ethereum", "Dogecoin", "Litecoin",
-        "Solend", "Orca", "Raydium", "Serum", "Marinade", "Jito", "Jupiter", 
-        "Osmosis", "Astroport", "Wormhole", "Pyth"
-    ]
-    
-    # Simple keyword extraction
-    lowercase_query = query.lower()
-    found_terms = []
-    
-    for term in important_terms:
-        if term.lower() in lowercase_query:
-            found_terms.append(term)
+    # Protocol and chain names come from the catalog automaton in a single pass over the query
+    found_terms = find_keyword_names(query)
     
     if found_terms:
         return ", ".join(found_terms)
@@ -0,0 +1,77 @@
+import time
+
+from uagents import Context
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Circuit breaker for calls to an unreliable dependency.
+
+    Closed, every call is allowed and consecutive failures are counted. After
+    failure_threshold of them the breaker opens and calls are refused, so callers
+    can answer another way at once instead of waiting on a timeout. Once
+    reset_seconds have passed it goes half-open and lets a single probe call
+    through: a success closes it again, a failure reopens it. A probe that never
+    reports back is replaced by a new one after another reset_seconds.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self._failures = 0
+        self._changed_at = time.time()
+        self._probe_started = None
+        self.opened = 0
+        self.probes = 0
+        self.rejected = 0
+
+    def allow_request(self, ctx: Context) -> bool:
+        """Whether a call may be made now, letting a probe through when the open period is over"""
+        if self.state == CLOSED:
+            return True
+
+        now = time.time()
+        if self.state == OPEN and now - self._changed_at >= self.reset_seconds:
+            self._transition(ctx, HALF_OPEN)
+        if self.state == HALF_OPEN and (self._probe_started is None or now - self._probe_started >= self.reset_seconds):
+            self._probe_started = now
+            self.probes += 1
+            ctx.logger.info(f"Circuit {self.name} sending a probe")
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self, ctx: Context):
+        self._failures = 0
+        if self.state != CLOSED:
+            self._transition(ctx, CLOSED)
+
+    def record_failure(self, ctx: Context):
+        self._failures += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self._failures >= self.failure_threshold):
+            self._transition(ctx, OPEN)
+
+    def _transition(self, ctx: Context, state: str):
+        reason = f" after {self._failures} consecutive failures" if state == OPEN else ""
+        ctx.logger.warning(f"Circuit {self.name} {self.state} -> {state}{reason}")
+        self.state = state
+        self._changed_at = time.time()
+        self._probe_started = None
+        if state == OPEN:
+            self.opened += 1
+
+    def metrics(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "state_seconds": round(time.time() - self._changed_at, 1),
+            "opened": self.opened,
+            "probes": self.probes,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,56 @@
+import base64
+import zlib
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, zlib is always available
+    zstandard = None
+
+# Answers shorter than this are sent as plain text even when the requester accepts
+# compression, as the base64 overhead would outweigh the saving
+MIN_COMPRESS_BYTES = 512
+
+ENCODINGS = {
+    "zlib": (lambda data: zlib.compress(data, 9), zlib.decompress),
+}
+if zstandard is not None:
+    ENCODINGS["zstd"] = (
+        zstandard.ZstdCompressor(level=19).compress,
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+
+def negotiate(accepted: Optional[list]) -> Optional[str]:
+    """
+    Pick the first encoding in the requester's preference order that the agent supports
+    """
+    for encoding in accepted or ():
+        if encoding in ENCODINGS:
+            return encoding
+    return None
+
+def encode_payload(text: str, encoding: str) -> str:
+    """
+    Compress text with the given encoding and return it as base64 for a string message field
+    """
+    compress, _ = ENCODINGS[encoding]
+    return base64.b64encode(compress(text.encode())).decode("ascii")
+
+def decode_payload(payload: str, encoding: Optional[str]) -> str:
+    """
+    Reverse encode_payload; payloads without an encoding are returned unchanged
+    """
+    if encoding is None:
+        return payload
+    _, decompress = ENCODINGS[encoding]
+    return decompress(base64.b64decode(payload)).decode()
+
+def maybe_encode(text: str, accepted: Optional[list]) -> tuple:
+    """
+    Return (payload, encoding) for an answer, compressing it only when the requester
+    accepts an encoding we support and the answer is large enough to benefit
+    """
+    encoding = negotiate(accepted)
+    if encoding is None or len(text.encode()) < MIN_COMPRESS_BYTES:
+        return text, None
+    return encode_payload(text, encoding), encoding
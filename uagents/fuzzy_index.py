@@ -0,0 +1,120 @@
+import heapq
+from collections import defaultdict
+from typing import Iterable, Optional
+
+def _trigrams(term: str) -> set:
+    """
+    Split a term into padded character trigrams, e.g. "orca" -> {"  o", " or", "orc", "rca", "ca "}
+    """
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """
+    Levenshtein distance between two strings. With max_distance, gives up as soon as
+    the distance is known to exceed it and returns max_distance + 1.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+class TrigramIndex:
+    """
+    Typo-tolerant lookup from normalized terms to the values they identify.
+
+    Candidates are gathered from trigram posting lists, so a query only touches
+    terms that share at least one trigram with it rather than the whole catalog.
+    Generic words such as "protocol" are stripped from both ends of terms and
+    queries first: they are shared by many terms, so they would only make every
+    query touch (and suggest) those terms.
+    """
+
+    def __init__(self, terms: Iterable[tuple], min_similarity: float = 0.3, generic_words: Iterable[str] = ()):
+        self.min_similarity = min_similarity
+        self.generic_words = tuple(generic_words)
+        self._terms = []
+        self._values = []
+        self._trigram_counts = []
+        self._postings = defaultdict(list)
+
+        seen = set()
+        for term, value in terms:
+            term = self.strip_generic(term)
+            if (term, value) in seen:
+                continue
+            seen.add((term, value))
+            term_id = len(self._terms)
+            grams = _trigrams(term)
+            self._terms.append(term)
+            self._values.append(value)
+            self._trigram_counts.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(term_id)
+
+    def strip_generic(self, term: str) -> str:
+        """Remove generic words from the start and end of a term, keeping at least two characters"""
+        stripped = True
+        while stripped:
+            stripped = False
+            for word in self.generic_words:
+                if term.endswith(word) and len(term) - len(word) >= 2:
+                    term, stripped = term[:-len(word)], True
+                elif term.startswith(word) and len(term) - len(word) >= 2:
+                    term, stripped = term[len(word):], True
+        return term
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def search(self, query: str, limit: int = 5) -> list:
+        """
+        Return up to `limit` distinct values ranked by how closely their terms match the query
+        """
+        query = self.strip_generic(query)
+        if not query:
+            return []
+
+        query_grams = _trigrams(query)
+        shared = defaultdict(int)
+        for gram in query_grams:
+            for term_id in self._postings.get(gram, ()):
+                shared[term_id] += 1
+
+        candidates = []
+        for term_id, count in shared.items():
+            # Dice coefficient over trigram sets
+            similarity = 2 * count / (len(query_grams) + self._trigram_counts[term_id])
+            if similarity >= self.min_similarity:
+                candidates.append((similarity, term_id))
+
+        # Edit distance is only computed for the closest candidates by trigram similarity,
+        # and stops early once a term cannot beat the `limit` best values found so far
+        best = {}
+        for similarity, term_id in heapq.nlargest(limit * 4, candidates):
+            cutoff = None
+            if len(best) >= limit:
+                cutoff = heapq.nsmallest(limit, best.values())[-1][0]
+            distance = edit_distance(query, self._terms[term_id], cutoff)
+            if cutoff is not None and distance > cutoff:
+                continue
+            value = self._values[term_id]
+            score = (distance, -similarity, self._terms[term_id])
+            if value not in best or score < best[value]:
+                best[value] = score
+
+        return [value for value, _ in sorted(best.items(), key=lambda item: item[1])[:limit]]
@@ -0,0 +1,168 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from uagents import Context, Model
+
+class LatencyTracker:
+    """
+    Response latencies over a sliding window of the most recent requests
+    """
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+class HedgedRequests:
+    """
+    Sends each request to one agent of a pool and, if no response has arrived after
+    the hedge delay, sends the same request to the next agent, and so on through the
+    pool. The first response for a session wins; later ones are dropped, as is any
+    response arriving after the session was abandoned on timeout.
+
+    The hedge delay follows the observed latency: once enough responses have been
+    seen it is the given percentile of recent latencies, clamped to
+    [min_delay, max_delay], so only the slowest requests are duplicated.
+    """
+
+    def __init__(
+        self,
+        addresses: list,
+        percentile: float = 0.95,
+        initial_delay: float = 4.0,
+        min_delay: float = 0.5,
+        max_delay: float = 10.0,
+        min_samples: int = 20,
+        completed_memory: int = 1000,
+    ):
+        if not addresses:
+            raise ValueError("At least one agent address is required")
+        self.addresses = list(addresses)
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.latency = LatencyTracker()
+        # session id -> {"sent": {address: sent_at}, "timer": TimerHandle}
+        self._requests = {}
+        # Sessions that already got their response or timed out, so hedged duplicates and
+        # late responses can be dropped; the value says whether the session timed out
+        self._completed = OrderedDict()
+        self._completed_memory = completed_memory
+        self._next_primary = 0
+        self._tasks = set()
+        self.requests = 0
+        self.hedges = 0
+        self.duplicates = 0
+        self.late = 0
+
+    def hedge_delay(self) -> float:
+        if len(self.latency) < self.min_samples:
+            return self.initial_delay
+        return min(self.max_delay, max(self.min_delay, self.latency.percentile(self.percentile)))
+
+    def _pool_order(self) -> list:
+        # Rotate the primary so load is spread across the pool
+        start = self._next_primary
+        self._next_primary = (start + 1) % len(self.addresses)
+        return self.addresses[start:] + self.addresses[:start]
+
+    async def send(self, ctx: Context, session_id: str, message: Model):
+        """Send a request for a session, hedging it across the pool until a response arrives"""
+        order = self._pool_order()
+        # A new request in the same session replaces any earlier one
+        self.abandon(session_id)
+        self._completed.pop(session_id, None)
+        self._requests[session_id] = {"sent": {}, "timer": None}
+        self.requests += 1
+        await self._send_to(ctx, session_id, message, order)
+
+    async def _send_to(self, ctx: Context, session_id: str, message: Model, remaining: list):
+        request = self._requests.get(session_id)
+        if request is None:
+            return
+        address, remaining = remaining[0], remaining[1:]
+        request["sent"][address] = time.time()
+        await ctx.send(address, message)
+        if remaining:
+            request["timer"] = asyncio.get_running_loop().call_later(
+                self.hedge_delay(), self._hedge, ctx, session_id, message, remaining
+            )
+
+    def _hedge(self, ctx: Context, session_id: str, message: Model, remaining: list):
+        if session_id not in self._requests:
+            return
+        self.hedges += 1
+        ctx.logger.info(f"No response for session {session_id} after {self.hedge_delay():.2f}s, hedging to {remaining[0]}")
+        task = asyncio.ensure_future(self._send_to(ctx, session_id, message, remaining))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def accept(self, session_id: str, sender: str) -> bool:
+        """
+        Whether a response should be processed: true for the first response of a session,
+        false for the duplicates that hedging produces and for responses to sessions that
+        already timed out
+        """
+        if session_id in self._completed:
+            if self._completed[session_id]:
+                self.late += 1
+            else:
+                self.duplicates += 1
+            return False
+
+        request = self._requests.pop(session_id, None)
+        if request is not None:
+            if request["timer"] is not None:
+                request["timer"].cancel()
+            sent_at = request["sent"].get(sender)
+            if sent_at is not None:
+                self.latency.record(time.time() - sent_at)
+
+        self._complete(session_id, timed_out=False)
+        return True
+
+    def abandon(self, session_id: str) -> bool:
+        """
+        Stop hedging a session that timed out, returning whether a request was outstanding
+        for it; responses arriving for it later are dropped
+        """
+        request = self._requests.pop(session_id, None)
+        if request is None:
+            return False
+        if request["timer"] is not None:
+            request["timer"].cancel()
+        self._complete(session_id, timed_out=True)
+        return True
+
+    def _complete(self, session_id: str, timed_out: bool):
+        self._completed[session_id] = timed_out
+        while len(self._completed) > self._completed_memory:
+            self._completed.popitem(last=False)
+
+    def metrics(self) -> dict:
+        p50 = self.latency.percentile(0.5)
+        p95 = self.latency.percentile(0.95)
+        return {
+            "pool": len(self.addresses),
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "duplicates_dropped": self.duplicates,
+            "late_dropped": self.late,
+            "hedge_delay": round(self.hedge_delay(), 3),
+            "latency_p50": round(p50, 3) if p50 is not None else None,
+            "latency_p95": round(p95, 3) if p95 is not None else None,
+        }
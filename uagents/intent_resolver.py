@@ -0,0 +1,85 @@
+import re
+from typing import Optional
+
+import knowledge_base
+from knowledge_base import normalize_text
+
+# Words that can surround a protocol name in a query that asks about nothing else,
+# e.g. "what is soon?"
+_FILLER_WORDS = frozenset({
+    "a", "about", "explain", "info", "information", "is", "me", "on", "tell", "the", "what", "whats",
+})
+
+def find_catalog_terms(query: str) -> list:
+    """
+    Return the (kind, value) of every catalog term in the query, longest match first, in order of appearance
+    """
+    return knowledge_base.current().automaton.find_longest(normalize_text(query))
+
+def find_protocol_mentions(query: str) -> list:
+    """
+    Return the keys of every protocol named in the query, in order of first mention.
+
+    Phrases are matched longest first, so "SOON SVM" counts as SOON SVM alone
+    rather than also as a mention of SVM.
+    """
+    mentions = []
+    for kind, key in find_catalog_terms(query):
+        if kind == "protocol" and key not in mentions:
+            mentions.append(key)
+    return mentions
+
+def find_keyword_names(query: str) -> list:
+    """
+    Return display names for every protocol or chain mentioned in the query
+    """
+    kb = knowledge_base.current()
+    names = []
+    for kind, value in kb.automaton.find_longest(normalize_text(query)):
+        name = kb.names[value] if kind == "protocol" else value
+        if name not in names:
+            names.append(name)
+    return names
+
+def resolve_query_locally(query: str) -> Optional[str]:
+    """
+    Return the protocol key when the query names exactly one protocol.
+
+    Queries that mention no protocol, or several, are ambiguous and are left
+    for the LLM agent to resolve. So are queries whose only mention is a common
+    word or ticker (e.g. "soon", "RAY") unless it is written the way the catalog
+    writes it or the query is little more than the name.
+    """
+    kb = knowledge_base.current()
+    text = normalize_text(query)
+    matches = [(start, end, key) for start, end, (kind, key) in kb.automaton.find_longest_matches(text) if kind == "protocol"]
+    if len({key for _, _, key in matches}) != 1:
+        return None
+
+    for start, end, key in matches:
+        term = text[start:end]
+        forms = kb.ambiguous_spellings.get(term)
+        if forms is None or any(_contains_exact(query, form) for form in forms):
+            return key
+        if set((text[:start] + " " + text[end:]).split()) <= _FILLER_WORDS:
+            return key
+    return None
+
+def _contains_exact(query: str, spelling: str) -> bool:
+    """Whether the query contains the spelling as a whole word, with the same case"""
+    return re.search(rf"(?<![0-9A-Za-z]){re.escape(spelling)}(?![0-9A-Za-z])", query) is not None
+
+def resolve_query_best_effort(query: str) -> Optional[str]:
+    """
+    Return the most likely protocol key without the LLM agent: the first protocol
+    named in the query, otherwise the best full-text search hit. Used when the LLM
+    agent is unavailable, so ambiguous queries still get a catalog answer.
+    """
+    mentions = find_protocol_mentions(query)
+    if mentions:
+        return mentions[0]
+    kb = knowledge_base.current()
+    for (source, key), _score in kb.search_index.search(query, 5):
+        if source == "defi":
+            return key
+    return None
@@ -0,0 +1,94 @@
+from collections import deque
+from typing import Any, Iterable
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton that finds every known keyword in a single pass over the text.
+
+    Matches are only reported on word boundaries, so "mars" is found in
+    "mars protocol" but not in "marshmallow".
+    """
+
+    def __init__(self, keywords: Iterable[tuple]):
+        self._goto = [{}]
+        self._fail = [0]
+        # Each state lists the (length, value) of every keyword ending there
+        self._output = [[]]
+        self._keyword_count = 0
+
+        for keyword, value in keywords:
+            self._add(keyword, value)
+        self._build_failure_links()
+
+    def __len__(self) -> int:
+        return self._keyword_count
+
+    def _add(self, keyword: str, value: Any):
+        if not keyword:
+            return
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        # The first value registered for a keyword wins
+        if not any(length == len(keyword) for length, _ in self._output[state]):
+            self._output[state].append((len(keyword), value))
+            self._keyword_count += 1
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text: str) -> list:
+        """
+        Return (start, end, value) for every keyword occurrence on word boundaries
+        """
+        matches = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, value in self._output[state]:
+                start, end = index - length + 1, index + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if end < len(text) and text[end].isalnum():
+                    continue
+                matches.append((start, end, value))
+        return matches
+
+    def find_longest_matches(self, text: str) -> list:
+        """
+        Return (start, end, value) for non-overlapping matches, preferring the longest
+        keyword at each position, in order of appearance
+        """
+        matches = sorted(self.find_all(text), key=lambda match: (match[0], match[0] - match[1]))
+        longest = []
+        covered_until = 0
+        for start, end, value in matches:
+            if start >= covered_until:
+                longest.append((start, end, value))
+                covered_until = end
+        return longest
+
+    def find_longest(self, text: str) -> list:
+        """
+        Return the values of non-overlapping matches, preferring the longest
+        keyword at each position, in order of appearance
+        """
+        return [value for _, _, value in self.find_longest_matches(text)]
@@ -0,0 +1,445 @@
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Optional
+
+from catalog import CATALOG_SOURCES, CompiledCatalog, load_catalog
+from compression import ENCODINGS, maybe_encode, negotiate
+from fuzzy_index import TrigramIndex
+from keyword_automaton import KeywordAutomaton
+from records import CatalogRecord
+from search_index import BM25Index
+
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+_PARENTHETICAL = re.compile(r"\(([^)]*)\)")
+_WORD = re.compile(r"[0-9a-z]+")
+
+# Number of past catalog versions whose entry hashes are kept for delta responses
+VERSION_HISTORY_SIZE = 16
+
+# Parts of a protocol entry that callers can request individually
+PROTOCOL_SECTIONS = CatalogRecord._fields
+
+# Fields of a catalog entry that are indexed for full-text search
+SEARCH_FIELDS = ("name", "description", "key_features", "technical_aspects")
+
+# Words shared by many protocol names that say nothing about which protocol is meant,
+# left out of "did you mean" matching
+FUZZY_GENERIC_WORDS = ("protocol", "network", "finance", "exchange", "dex")
+
+# Protocol spellings that are also everyday English words. Like ticker aliases (all
+# caps, such as "RAY"), they only count as a confident mention when written as the
+# catalog writes them, so "how soon can I stake" is not taken to mean SOON SVM
+COMMON_WORD_SPELLINGS = frozenset({
+    "astro", "jupiter", "marinade", "mars", "orca", "portal", "ray", "serum", "soon", "walrus", "wormhole",
+})
+
+def normalize_protocol_name(name: str) -> str:
+    """
+    Reduce a protocol name to lowercase alphanumerics so spelling variants compare equal
+    """
+    return _NON_ALPHANUMERIC.sub("", name.casefold())
+
+def normalize_text(text: str) -> str:
+    """
+    Lowercase text and collapse every run of punctuation or whitespace into a single space
+    """
+    return " ".join(_WORD.findall(text.casefold()))
+
+def _name_variants(name: str) -> list:
+    """
+    Return a display name plus its parts with and without any parenthetical,
+    e.g. "Pyth Network (PYTH)" -> ["Pyth Network (PYTH)", "Pyth Network", "PYTH"]
+    """
+    variants = [name, _PARENTHETICAL.sub("", name)]
+    variants.extend(_PARENTHETICAL.findall(name))
+    return variants
+
+def protocol_spellings(key: str, protocol) -> list:
+    """
+    Return every known spelling of a protocol record or summary: its key, name variants and aliases
+    """
+    return [key, *_name_variants(protocol.name), *protocol.aliases]
+
+def render_protocol_chunks(protocol: CatalogRecord) -> tuple:
+    """
+    Format a protocol entry as consecutive plain-text chunks: the header with its
+    description first, then one chunk per remaining section. Joined, the chunks are
+    exactly the full answer.
+    """
+    parts = [f"\n{protocol.name} - {protocol.category}\n"]
+
+    # Add blockchain/ecosystem/launched info if available
+    if protocol.blockchain is not None:
+        parts.append(f"Blockchain: {protocol.blockchain}\n")
+    if protocol.ecosystem is not None:
+        parts.append(f"Ecosystem: {protocol.ecosystem}\n")
+    if protocol.launched is not None:
+        parts.append(f"Launched: {protocol.launched}\n")
+
+    parts.append(f"\nDescription:\n{protocol.description}\n\n")
+    chunks = ["".join(parts)]
+
+    parts = ["Key Features:\n"]
+    parts.extend(f"- {feature}\n" for feature in protocol.key_features)
+    chunks.append("".join(parts))
+
+    parts = ["\nTechnical Aspects:\n"]
+    parts.extend(f"- {aspect}\n" for aspect in protocol.technical_aspects)
+    chunks.append("".join(parts))
+
+    parts = ["\nLearning Resources:\n"]
+    parts.extend(f"- {resource}\n" for resource in protocol.learning_resources)
+    chunks.append("".join(parts))
+
+    return tuple(chunks)
+
+def select_sections(sections: Optional[list] = None) -> tuple:
+    """
+    Validate a section selector and return it in catalog field order, every section when empty
+    """
+    if not sections:
+        return PROTOCOL_SECTIONS
+    unknown = set(sections) - set(PROTOCOL_SECTIONS)
+    if unknown:
+        raise ValueError(
+            f"Unknown sections: {', '.join(sorted(unknown))}. "
+            f"Choose from: {', '.join(PROTOCOL_SECTIONS)}"
+        )
+    return tuple(field for field in PROTOCOL_SECTIONS if field in sections)
+
+def render_sections(protocol: CatalogRecord, sections: tuple) -> str:
+    """
+    Format only the selected sections of a protocol entry as plain text
+    """
+    parts = []
+    for field, value in protocol.to_dict(sections).items():
+        title = field.replace("_", " ").title()
+        if isinstance(value, str):
+            parts.append(f"{title}: {value}\n")
+        elif isinstance(value, dict):
+            parts.append(f"\n{title}:\n")
+            parts.extend(f"- {group}: {', '.join(items)}\n" for group, items in value.items())
+        else:
+            parts.append(f"\n{title}:\n")
+            parts.extend(f"- {item}\n" for item in value)
+    return "".join(parts).lstrip("\n")
+
+def _entry_text(entry: CatalogRecord) -> str:
+    """
+    Join the searchable fields of a catalog entry into one document
+    """
+    parts = []
+    for field in SEARCH_FIELDS:
+        value = getattr(entry, field)
+        if isinstance(value, str):
+            parts.append(value)
+        else:
+            parts.extend(value)
+    return "\n".join(parts)
+
+def _source_stamp() -> tuple:
+    """
+    Modification time and size of every catalog source, a cheap change check
+    """
+    stamp = []
+    for name in sorted(CATALOG_SOURCES):
+        try:
+            stat = os.stat(CATALOG_SOURCES[name])
+            stamp.append((name, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stamp.append((name, None, None))
+    return tuple(stamp)
+
+class KnowledgeBase:
+    """
+    Every lookup structure derived from one compiled catalog.
+
+    A knowledge base is never changed once built, apart from caches that fill
+    from its own catalog, so a request holding a reference to it always sees a
+    consistent view even while a newer one is being built.
+    """
+
+    def __init__(self, catalog: CompiledCatalog, source_stamp: tuple = ()):
+        started = time.perf_counter()
+        self.catalog = catalog
+        self.version = catalog.source_digest[:12]
+        self.source_stamp = source_stamp
+        self.protocols = catalog.records("defi")
+        self.technologies = catalog.records("technology")
+
+        # Name, aliases, category, ecosystem and blockchain of every protocol,
+        # available without decoding the full records
+        self.summaries = MappingProxyType(catalog.summaries("defi"))
+        self.names = MappingProxyType(
+            {key: summary.name for key, summary in self.summaries.items()}
+        )
+        # Content hash of every protocol entry, compared across versions to build deltas
+        self.entry_hashes = MappingProxyType(dict(catalog.entry_hashes("defi")))
+        self.aliases = MappingProxyType(self._build_alias_index())
+        # "Did you mean" suggestions come from a trigram index over every normalized spelling
+        self.fuzzy_index = TrigramIndex(self.aliases.items(), generic_words=FUZZY_GENERIC_WORDS)
+        # Protocol spellings are added before technology and chain names, so a term that is both
+        # (such as Osmosis) is reported as the protocol
+        self.automaton = KeywordAutomaton(self._catalog_keywords())
+        self.ambiguous_spellings = MappingProxyType(self._build_ambiguous_spellings())
+        self.ecosystem_listing = self._render_ecosystem_listing()
+
+        self._rendered = {}
+        self._chunks = {}
+        self._encoded = {}
+        self._lowercase_descriptions = None
+        self._search_index = None
+        self.loaded_at = time.time()
+        self.build_seconds = time.perf_counter() - started
+
+    def _build_alias_index(self) -> dict:
+        """
+        Map every normalized key, name and alias to its protocol key
+        """
+        index = {}
+        # Canonical keys are added first so an alias can never shadow another protocol's key
+        for key in self.summaries:
+            index[normalize_protocol_name(key)] = key
+        for key, summary in self.summaries.items():
+            for spelling in protocol_spellings(key, summary):
+                normalized = normalize_protocol_name(spelling)
+                if normalized:
+                    index.setdefault(normalized, key)
+        return index
+
+    def _build_ambiguous_spellings(self) -> dict:
+        """
+        Map every normalized common-word or ticker spelling to the exact-case forms
+        the catalog writes it in, e.g. "soon" -> ("SOON",)
+        """
+        ambiguous = {}
+        for key, summary in self.summaries.items():
+            tickers = [alias for alias in summary.aliases if alias.isupper() and " " not in alias]
+            for spelling in protocol_spellings(key, summary):
+                term = normalize_text(spelling)
+                if term in COMMON_WORD_SPELLINGS or spelling in tickers:
+                    forms = ambiguous.setdefault(term, [])
+                    # The lowercase key is not how the name is written, so it is never a confident form
+                    if spelling != key and spelling not in forms:
+                        forms.append(spelling)
+        return {term: tuple(forms) for term, forms in ambiguous.items()}
+
+    def _catalog_keywords(self):
+        """
+        Yield (keyword, (kind, value)) pairs for every protocol spelling, technology and chain in the catalog
+        """
+        for key, summary in self.summaries.items():
+            for spelling in protocol_spellings(key, summary):
+                yield normalize_text(spelling), ("protocol", key)
+        # Blockchain technologies such as UTXO and WalletConnect, under their key and name variants
+        for key, summary in self.catalog.summaries("technology").items():
+            for spelling in protocol_spellings(key, summary):
+                yield normalize_text(spelling), ("technology", summary.name)
+        # Blockchains and ecosystems the catalog mentions, e.g. Solana, Cosmos, Neutron
+        for summary in self.summaries.values():
+            for field in ("blockchain", "ecosystem"):
+                for chain in (getattr(summary, field) or "").split(","):
+                    if chain.strip():
+                        yield normalize_text(chain), ("chain", chain.strip())
+
+    def _render_ecosystem_listing(self) -> str:
+        """
+        Format the per-ecosystem protocol listing shown when a protocol is not found
+        """
+        ecosystems = {"Solana": [], "Cosmos": [], "Cross-Ecosystem": []}
+        for summary in self.summaries.values():
+            if summary.ecosystem in ecosystems:
+                ecosystems[summary.ecosystem].append(summary.name)
+
+        return (
+            "Solana Ecosystem: " + ", ".join(ecosystems["Solana"]) + "\n\n"
+            + "Cosmos Ecosystem: " + ", ".join(ecosystems["Cosmos"]) + "\n\n"
+            + "Cross-Ecosystem: " + ", ".join(ecosystems["Cross-Ecosystem"])
+        )
+
+    def render(self, protocol_key: str) -> str:
+        """
+        Return the plain-text answer for a protocol key, rendering it on first request
+        """
+        rendered = self._rendered.get(protocol_key)
+        if rendered is None:
+            rendered = self._rendered[protocol_key] = "".join(self.chunks(protocol_key))
+        return rendered
+
+    def chunks(self, protocol_key: str) -> tuple:
+        """
+        Return the answer for a protocol key split into chunks for progressive delivery
+        """
+        chunks = self._chunks.get(protocol_key)
+        if chunks is None:
+            chunks = self._chunks[protocol_key] = render_protocol_chunks(self.protocols[protocol_key])
+        return chunks
+
+    def encoded(self, protocol_key: str, accepted: Optional[list] = None) -> tuple:
+        """
+        Return (payload, encoding) for a protocol's full answer in the best encoding the
+        requester accepts, compressing each answer once per encoding
+        """
+        encoding = negotiate(accepted)
+        if encoding is None:
+            return self.render(protocol_key), None
+        encoded = self._encoded.get((protocol_key, encoding))
+        if encoded is None:
+            encoded = self._encoded[(protocol_key, encoding)] = maybe_encode(self.render(protocol_key), [encoding])
+        return encoded
+
+    def lowercase_descriptions(self) -> dict:
+        """
+        Lowercase every description once, the first time a lookup falls back to descriptions
+        """
+        if self._lowercase_descriptions is None:
+            self._lowercase_descriptions = {
+                key: protocol.description.lower() for key, protocol in self.protocols.items()
+            }
+        return self._lowercase_descriptions
+
+    @property
+    def search_index(self) -> BM25Index:
+        """
+        BM25 index over protocols and technologies, built on the first search
+        """
+        if self._search_index is None:
+            documents = [(("defi", key), _entry_text(protocol)) for key, protocol in self.protocols.items()]
+            documents += [(("technology", key), _entry_text(technology)) for key, technology in self.technologies.items()]
+            self._search_index = BM25Index(documents)
+        return self._search_index
+
+    def warm(self):
+        """
+        Build every lazily built structure up front, used for background reloads
+        """
+        started = time.perf_counter()
+        for key in self.protocols:
+            for encoding in ENCODINGS:
+                self.encoded(key, [encoding])
+        self.lowercase_descriptions()
+        self.search_index
+        self.build_seconds += time.perf_counter() - started
+
+    def status(self) -> dict:
+        return {
+            "version": self.version,
+            "loaded_at": int(self.loaded_at),
+            "build_seconds": round(self.build_seconds, 4),
+            "protocols": len(self.protocols),
+            "technologies": len(self.technologies),
+        }
+
+def build_knowledge_base(warm: bool = False) -> KnowledgeBase:
+    """
+    Load the compiled catalog, recompiling it if its sources changed, and derive every lookup structure
+    """
+    # Stamp the sources before loading so an edit made during the build triggers another reload
+    stamp = _source_stamp()
+    knowledge_base = KnowledgeBase(load_catalog(), stamp)
+    if warm:
+        knowledge_base.warm()
+    return knowledge_base
+
+# Built on the first call to current() rather than at import, so importing the
+# agent modules stays cheap and the catalog is only loaded once it is needed
+_current = None
+_build_lock = threading.Lock()
+# Entry hashes of recently served versions, oldest first
+_history = OrderedDict()
+_reload_lock = asyncio.Lock()
+# Source stamp of the last reload that failed, so broken sources are not retried until edited again
+_rejected_stamp = None
+
+def current() -> KnowledgeBase:
+    """
+    Return the knowledge base in service. Callers should hold on to the returned
+    object for the length of a request rather than calling this repeatedly.
+    """
+    global _current
+    if _current is None:
+        with _build_lock:
+            if _current is None:
+                _current = build_knowledge_base()
+                _remember(_current)
+    return _current
+
+def _remember(knowledge_base: KnowledgeBase):
+    _history[knowledge_base.version] = knowledge_base.entry_hashes
+    _history.move_to_end(knowledge_base.version)
+    while len(_history) > VERSION_HISTORY_SIZE:
+        _history.popitem(last=False)
+
+def changes_since(known_version: str, knowledge_base: Optional[KnowledgeBase] = None) -> Optional[dict]:
+    """
+    Return the protocols added, changed and removed between a past version and the
+    given (or current) knowledge base, or None if that version is no longer remembered
+    """
+    knowledge_base = knowledge_base or current()
+    previous = _history.get(known_version)
+    if previous is None:
+        return None
+
+    hashes = knowledge_base.entry_hashes
+    return {
+        "added": {key: knowledge_base.names[key] for key in hashes if key not in previous},
+        "changed": {
+            key: knowledge_base.names[key]
+            for key in hashes
+            if key in previous and previous[key] != hashes[key]
+        },
+        "removed": [key for key in previous if key not in hashes],
+    }
+
+def entry_unchanged_since(known_version: str, protocol_key: str, knowledge_base: Optional[KnowledgeBase] = None) -> bool:
+    """
+    Whether a protocol entry is the same now as it was in a past catalog version
+    """
+    knowledge_base = knowledge_base or current()
+    if known_version == knowledge_base.version:
+        return True
+    previous = _history.get(known_version)
+    return (
+        previous is not None
+        and protocol_key in knowledge_base.entry_hashes
+        and previous.get(protocol_key) == knowledge_base.entry_hashes[protocol_key]
+    )
+
+def sources_changed() -> bool:
+    stamp = _source_stamp()
+    return stamp != current().source_stamp and stamp != _rejected_stamp
+
+async def reload_if_changed(logger: Optional[logging.Logger] = None) -> bool:
+    """
+    Rebuild the knowledge base in a worker thread when its sources change and swap it in.
+
+    The new knowledge base is fully built and warmed before a single reference
+    assignment replaces the old one, so in-flight requests never see a partial index.
+    """
+    global _current, _rejected_stamp
+    if _reload_lock.locked() or not sources_changed():
+        return False
+
+    logger = logger or logging.getLogger(__name__)
+    async with _reload_lock:
+        previous = current()
+        try:
+            reloaded = await asyncio.to_thread(build_knowledge_base, True)
+        except Exception as err:
+            logger.error(f"Catalog reload failed, keeping version {previous.version}: {err}")
+            _rejected_stamp = _source_stamp()
+            return False
+
+        _current = reloaded
+        _remember(reloaded)
+        logger.info(
+            f"Catalog reloaded: version {previous.version} -> {reloaded.version} "
+            f"in {reloaded.build_seconds:.3f}s"
+        )
+        return True
@@ -0,0 +1,90 @@
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from uagents import Context
+
+class RateLimiter:
+    """
+    Sliding-window rate limiter with one window per sender.
+
+    Each sender's recent request times are kept in a deque, so expiring old
+    requests and recording a new one are O(1) amortized. Senders are kept in
+    least-recently-active order and dropped once their window is empty or when
+    more than max_senders are tracked, which bounds memory.
+    """
+
+    def __init__(
+        self,
+        requests_per_hour: int = 6,
+        window_seconds: float = 3600,
+        max_senders: int = 10000,
+        storage_key: Optional[str] = None,
+    ):
+        self.requests_per_hour = requests_per_hour
+        self.window_seconds = window_seconds
+        self.max_senders = max_senders
+        # Storage key the windows are saved under so limits survive restarts; None keeps them in memory only
+        self.storage_key = storage_key
+        self._windows = OrderedDict()
+        self._loaded = storage_key is None
+        self._dirty = False
+
+    async def check_rate_limit(self, ctx: Context, sender: str) -> bool:
+        """Check if the sender is within their rate limit, recording the request if so"""
+        if not self._loaded:
+            self.load(ctx.storage)
+
+        current_time = time.time()
+        self._evict(current_time)
+        window = self._windows.get(sender)
+        if window is None:
+            window = self._windows[sender] = deque()
+        else:
+            self._windows.move_to_end(sender)
+
+        # Drop requests that have slid out of the window
+        while window and current_time - window[0] >= self.window_seconds:
+            window.popleft()
+
+        if len(window) >= self.requests_per_hour:
+            ctx.logger.warning(f"Rate limit exceeded for {sender}: {len(window)} requests in the last hour")
+            return False
+
+        window.append(current_time)
+        self._dirty = True
+        return True
+
+    def _evict(self, current_time: float):
+        """Drop idle senders from the least recently active end"""
+        while self._windows:
+            sender, window = next(iter(self._windows.items()))
+            idle = not window or current_time - window[-1] >= self.window_seconds
+            if not idle and len(self._windows) <= self.max_senders:
+                break
+            del self._windows[sender]
+            self._dirty = True
+
+    def load(self, storage):
+        """Restore the windows saved by save(), skipping requests that have already expired"""
+        self._loaded = True
+        saved = storage.get(self.storage_key) if self.storage_key else None
+        if not saved:
+            return
+        current_time = time.time()
+        for sender, times in saved.items():
+            window = deque(t for t in times if current_time - t < self.window_seconds)
+            if window:
+                self._windows[sender] = window
+        self._evict(current_time)
+
+    def save(self, storage):
+        """Write the windows to storage if they changed since the last save"""
+        if not self.storage_key or not self._dirty:
+            return
+        self._evict(time.time())
+        storage.set(self.storage_key, {sender: list(window) for sender, window in self._windows.items()})
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._windows)
@@ -0,0 +1,81 @@
+import sys
+from typing import NamedTuple, Optional, Tuple
+
+# Short values repeated across many entries, interned so every record shares one copy
+_INTERNED_FIELDS = frozenset({"name", "category", "launched", "blockchain", "ecosystem", "used_in", "application"})
+
+# Fields stored as {group: [items]} in the catalog sources, kept as ((group, (items...)), ...)
+_GROUPED_FIELDS = frozenset({"usage_flows", "wallet_compatibility"})
+
+def _freeze(field: str, value):
+    if field in _GROUPED_FIELDS:
+        return tuple((sys.intern(group), tuple(items)) for group, items in value.items())
+    if isinstance(value, list):
+        return tuple(value)
+    if field in _INTERNED_FIELDS:
+        return sys.intern(value)
+    return value
+
+class CatalogRecord(NamedTuple):
+    """
+    Immutable catalog entry for a DeFi protocol or blockchain technology.
+
+    Named tuples carry no per-instance __dict__, so a record costs one pointer
+    per field instead of a hash table, and optional fields are simply empty.
+    """
+    name: str
+    category: str
+    description: str
+    aliases: Tuple[str, ...] = ()
+    launched: Optional[str] = None
+    blockchain: Optional[str] = None
+    ecosystem: Optional[str] = None
+    used_in: Optional[str] = None
+    application: Optional[str] = None
+    key_features: Tuple[str, ...] = ()
+    technical_aspects: Tuple[str, ...] = ()
+    wallet_compatibility: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()
+    architecture_components: Tuple[str, ...] = ()
+    security_features: Tuple[str, ...] = ()
+    implementation_details: Tuple[str, ...] = ()
+    client_functions: Tuple[str, ...] = ()
+    usage_flows: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()
+    learning_resources: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CatalogRecord":
+        """
+        Build a record from a catalog source entry, raising TypeError on unknown fields
+        """
+        return cls(**{field: _freeze(field, value) for field, value in data.items()})
+
+    def to_dict(self, fields: Optional[Tuple[str, ...]] = None) -> dict:
+        """
+        Convert the record, or only the given fields, back to the shape of a catalog
+        source entry, leaving out fields the entry does not set
+        """
+        data = {}
+        for field in fields or self._fields:
+            value = getattr(self, field)
+            if value is None or value == ():
+                continue
+            if field in _GROUPED_FIELDS:
+                value = {group: list(items) for group, items in value}
+            elif isinstance(value, tuple):
+                value = list(value)
+            data[field] = value
+        return data
+
+class CatalogSummary(NamedTuple):
+    """
+    The few fields of an entry needed to build lookup indexes without decoding the record
+    """
+    name: str
+    aliases: Tuple[str, ...] = ()
+    category: Optional[str] = None
+    ecosystem: Optional[str] = None
+    blockchain: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CatalogSummary":
+        return cls(**{field: _freeze(field, value) for field, value in data.items()})
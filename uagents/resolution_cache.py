@@ -0,0 +1,81 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from knowledge_base import normalize_text
+
+class ResolutionCache:
+    """
+    LRU cache with a TTL mapping normalized chat queries to the protocol name the
+    structured-output agent extracted from them.
+
+    Each entry also counts how often it was asked for. Saved entries are reloaded
+    most frequent first, so after a restart the cache is warmed with the questions
+    users ask most rather than the ones asked last.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 86400, storage_key: Optional[str] = "resolution_cache"):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.storage_key = storage_key
+        # query -> [protocol_name, stored_at, hits], least recently used first
+        self._entries = OrderedDict()
+        self._loaded = storage_key is None
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query: str) -> Optional[str]:
+        """Return the protocol name cached for a query, or None if it is unknown or expired"""
+        key = normalize_text(query)
+        entry = self._entries.get(key)
+        if entry is None or time.time() - entry[1] >= self.ttl_seconds:
+            if entry is not None:
+                del self._entries[key]
+                self._dirty = True
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        entry[2] += 1
+        self._dirty = True
+        self.hits += 1
+        return entry[0]
+
+    def put(self, query: str, protocol_name: str):
+        """Cache the protocol name resolved for a query, evicting the least recently used entry if full"""
+        key = normalize_text(query)
+        if not key:
+            return
+        previous = self._entries.pop(key, None)
+        self._entries[key] = [protocol_name, time.time(), previous[2] if previous else 1]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._dirty = True
+
+    def load(self, storage):
+        """Warm the cache from saved entries, most frequently asked first, once per process"""
+        if self._loaded:
+            return
+        self._loaded = True
+        saved = storage.get(self.storage_key) if self.storage_key else None
+        if not saved:
+            return
+        now = time.time()
+        live = [(query, entry) for query, entry in saved.items() if now - entry[1] < self.ttl_seconds]
+        # Keep the most frequent, then order them least frequent first so they are evicted first
+        live.sort(key=lambda item: item[1][2], reverse=True)
+        for query, entry in reversed(live[:self.max_entries]):
+            self._entries.setdefault(query, list(entry))
+
+    def save(self, storage):
+        """Write the entries to storage if they changed since the last save"""
+        if not self.storage_key or not self._dirty:
+            return
+        storage.set(self.storage_key, dict(self._entries))
+        self._dirty = False
+
+    def metrics(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        return len(self._entries)
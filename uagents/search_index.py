@@ -0,0 +1,71 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Iterable
+
+_TOKEN = re.compile(r"[0-9a-z]+")
+
+# Words that carry no meaning for protocol search and would otherwise match every document
+STOPWORDS = frozenset({
+    "a", "about", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does",
+    "for", "from", "how", "i", "in", "is", "it", "me", "of", "on", "or", "tell",
+    "that", "the", "this", "to", "what", "which", "who", "with",
+})
+
+def tokenize(text: str) -> list:
+    """
+    Split text into lowercase alphanumeric tokens, dropping stopwords
+    """
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+class BM25Index:
+    """
+    Okapi BM25 ranking over an inverted index.
+
+    Term frequencies and document length norms are computed once at build time,
+    so a query only walks the posting lists of its own terms.
+    """
+
+    def __init__(self, documents: Iterable[tuple], k1: float = 1.2, b: float = 0.75):
+        self._doc_ids = []
+        self._postings = defaultdict(list)
+        lengths = []
+
+        for doc_id, text in documents:
+            position = len(self._doc_ids)
+            tokens = tokenize(text)
+            self._doc_ids.append(doc_id)
+            lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                self._postings[term].append((position, frequency))
+
+        doc_count = len(self._doc_ids)
+        average_length = sum(lengths) / doc_count if doc_count else 0.0
+        self._idf = {
+            term: math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+        self._k1 = k1
+        # Per-document length normalization folded into a single constant
+        self._norms = [
+            k1 * (1 - b + b * length / average_length) if average_length else k1
+            for length in lengths
+        ]
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    def search(self, query: str, top_k: int = 5) -> list:
+        """
+        Return up to top_k (doc_id, score) pairs, highest score first
+        """
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for position, frequency in self._postings[term]:
+                scores[position] += idf * frequency * (self._k1 + 1) / (frequency + self._norms[position])
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(self._doc_ids[position], score) for position, score in ranked]
@@ -0,0 +1,278 @@
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable
+
+from uagents import Context
+from uagents.storage import KeyValueStore
+
+# Storage keys written one per session field by earlier versions: a session id (a UUID)
+# optionally followed by a field suffix such as "_query"
+_SESSION_KEY = re.compile(r"^([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})(_[a-z_]+)?$")
+
+def _key_value_store_internals(storage) -> tuple:
+    """
+    Return the key dict and file path behind a uagents KeyValueStore, or (None, None)
+    for any other storage backend.
+
+    The storage interface has no way to list keys or report its size, so this is the
+    one place that reads the KeyValueStore's private attributes. Without them the
+    legacy key sweep is skipped and the size figures are reported as None.
+    """
+    if not isinstance(storage, KeyValueStore):
+        return None, None
+    return getattr(storage, "_data", None), getattr(storage, "_path", None)
+
+class PendingSessions:
+    """
+    Chat sessions waiting on the LLM, each with its own fallback timer.
+
+    Every session gets an event loop timer (loop.call_later, kept in the loop's
+    deadline heap) that fires its timeout callback exactly at the deadline and
+    is cancelled as soon as the session is removed, so nothing runs while no
+    session is pending.
+
+    Pending sessions are kept in memory only. A fallback can only reach the user
+    through the context of their own chat session, which does not survive a
+    restart, so timers are never re-armed from storage.
+    """
+
+    def __init__(self):
+        self._deadlines = {}
+        self._timers = {}
+        self._tasks = set()
+
+    def add(self, session_id: str, deadline: float, on_timeout: Callable[[str], Awaitable[None]]):
+        """
+        Register a session, replacing any earlier deadline, and call on_timeout(session_id)
+        if it is still pending at the deadline
+        """
+        self._cancel_timer(session_id)
+        self._deadlines[session_id] = deadline
+        loop = asyncio.get_running_loop()
+        self._timers[session_id] = loop.call_later(
+            max(0.0, deadline - time.time()), self._expire, session_id, on_timeout
+        )
+
+    def remove(self, session_id: str) -> bool:
+        """Stop tracking a session and cancel its timer, returning whether it was pending"""
+        self._cancel_timer(session_id)
+        return self._deadlines.pop(session_id, None) is not None
+
+    def _cancel_timer(self, session_id: str):
+        timer = self._timers.pop(session_id, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _expire(self, session_id: str, on_timeout: Callable[[str], Awaitable[None]]):
+        self._timers.pop(session_id, None)
+        if self._deadlines.pop(session_id, None) is None:
+            return
+        task = asyncio.ensure_future(on_timeout(session_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    def discard_saved(storage) -> int:
+        """
+        Remove the pending sessions earlier versions saved to storage, as a snapshot or
+        as the comma-joined "active_sessions" string, returning how many there were
+        """
+        discarded = 0
+        if storage.has("pending_sessions"):
+            discarded += len(storage.get("pending_sessions") or {})
+            storage.remove("pending_sessions")
+        if storage.has("active_sessions"):
+            discarded += len([s for s in (storage.get("active_sessions") or "").split(",") if s.strip()])
+            storage.remove("active_sessions")
+        return discarded
+
+    def __contains__(self, session_id) -> bool:
+        return session_id in self._deadlines
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+class SessionStore:
+    """
+    Write-behind store for chat session state.
+
+    Every session's fields (sender, query, extracted protocol and so on) live in
+    memory and are written to storage together under a single key by flush(),
+    which runs on an interval and at shutdown. A chat message therefore costs
+    no storage writes of its own, and a crash loses at most one flush interval
+    of session state.
+
+    Sessions are kept in least-recently-active order, so each compaction pass
+    only looks at the front of the queue and stops at the first session that is
+    still live. Session keys written one per field by earlier versions are swept
+    from storage incrementally.
+    """
+
+    def __init__(self, ttl_seconds: float, storage_key: str = "chat_sessions"):
+        self.ttl_seconds = ttl_seconds
+        self.storage_key = storage_key
+        self._sessions = OrderedDict()
+        self._storage = None
+        self._legacy_scan = deque()
+        self._dirty = False
+        self.flushes = 0
+        self.removed_sessions = 0
+        self.removed_keys = 0
+
+    def attach(self, storage):
+        """Load the sessions saved by a previous run into memory, once per process"""
+        if self._storage is not None:
+            return
+        self._storage = storage
+        # Merge with any sessions written before the load, keeping least recently active first
+        merged = {**(storage.get(self.storage_key) or {}), **self._sessions}
+        self._sessions = OrderedDict(sorted(merged.items(), key=lambda item: item[1]["last_active"]))
+        # Per-session activity was tracked under its own key before sessions were stored together
+        if storage.has("session_activity"):
+            storage.remove("session_activity")
+
+    def get(self, session_id: str, field: str):
+        session = self._sessions.get(session_id)
+        return session.get(field) if session is not None else None
+
+    def set(self, session_id: str, **fields):
+        """Update fields of a session in memory and mark it recently active"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = {}
+        else:
+            self._sessions.move_to_end(session_id)
+        session.update(fields)
+        session["last_active"] = time.time()
+        self._dirty = True
+
+    def end(self, session_id: str) -> bool:
+        """Forget a finished session right away"""
+        if self._sessions.pop(session_id, None) is None:
+            return False
+        self.removed_sessions += 1
+        self._dirty = True
+        return True
+
+    def compact(self, budget: int = 100, keep: Callable[[str], bool] = lambda session_id: False) -> int:
+        """
+        Drop up to `budget` sessions idle past the TTL and delete up to `budget` legacy
+        per-field keys from storage, returning how many of both were removed. Sessions
+        for which keep(session_id) is true are left alone.
+        """
+        now = time.time()
+        removed = 0
+        for _ in range(budget):
+            if not self._sessions:
+                break
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session["last_active"] < self.ttl_seconds:
+                break
+            if keep(session_id):
+                # Still waiting on a response, look again after another TTL
+                self.set(session_id)
+                continue
+            del self._sessions[session_id]
+            self.removed_sessions += 1
+            self._dirty = True
+            removed += 1
+        return removed + self._sweep_legacy_keys(budget)
+
+    def _sweep_legacy_keys(self, budget: int) -> int:
+        data, _ = _key_value_store_internals(self._storage)
+        if data is None:
+            return 0
+        if not self._legacy_scan:
+            self._legacy_scan.extend(key for key in data if _SESSION_KEY.match(key))
+
+        removed = 0
+        for _ in range(min(budget, len(self._legacy_scan))):
+            key = self._legacy_scan.popleft()
+            if key in data:
+                self._storage.remove(key)
+                removed += 1
+        self.removed_keys += removed
+        return removed
+
+    def flush(self):
+        """Write every session to storage in one set, if anything changed since the last flush"""
+        if self._storage is None or not self._dirty:
+            return
+        self._storage.set(self.storage_key, dict(self._sessions))
+        self._dirty = False
+        self.flushes += 1
+
+    def metrics(self) -> dict:
+        """Session and storage size figures for the agent status response"""
+        data, path = _key_value_store_internals(self._storage)
+        return {
+            "sessions": len(self._sessions),
+            "unflushed": self._dirty,
+            "flushes": self.flushes,
+            "removed_sessions": self.removed_sessions,
+            "removed_keys": self.removed_keys,
+            # Legacy keys can only be swept from storage whose keys can be listed
+            "legacy_sweep": data is not None,
+            "storage_keys": len(data) if data is not None else None,
+            "storage_bytes": os.path.getsize(path) if path and os.path.isfile(path) else None,
+        }
+
+    def __contains__(self, session_id) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+class InFlightQueries:
+    """
+    Single-flight tracking of queries sent to the LLM.
+
+    The first session to ask a query leads the flight and sends the prompt.
+    Sessions asking the same query while it is in flight join as waiters with
+    the context of their own chat message, through which the leader's response
+    is delivered to each of them. A flight older than
+    max_age_seconds, or whose leader timed out, accepts no new waiters, so a
+    lost response never holds later sessions back.
+    """
+
+    def __init__(self, max_age_seconds: float):
+        self.max_age_seconds = max_age_seconds
+        # query -> (leader session id, started at)
+        self._flights = {}
+        # leader session id -> (query, {waiting session id: its context})
+        self._waiters = {}
+        self.coalesced = 0
+
+    def join(self, query: str, session_id: str, ctx: Context) -> bool:
+        """
+        Attach a session to the flight for a query, returning True if it leads a new
+        flight and must send the prompt itself. A session asking again for a query it
+        is already leading or waiting on stays where it is.
+        """
+        flight = self._flights.get(query)
+        if flight is not None and time.time() - flight[1] < self.max_age_seconds:
+            waiters = self._waiters[flight[0]][1]
+            if session_id != flight[0] and session_id not in waiters:
+                waiters[session_id] = ctx
+                self.coalesced += 1
+            return False
+        self._flights[query] = (session_id, time.time())
+        self._waiters[session_id] = (query, {})
+        return True
+
+    def complete(self, session_id: str) -> dict:
+        """End the flight led by a session, returning the sessions waiting on it with their contexts"""
+        query, waiters = self._waiters.pop(session_id, (None, {}))
+        if self._flights.get(query, (None,))[0] == session_id:
+            del self._flights[query]
+        return waiters
+
+    def abandon(self, session_id: str):
+        """End the flight led by a session that timed out; its waiters keep their own timers"""
+        self.complete(session_id)
+
+    def metrics(self) -> dict:
+        return {"in_flight": len(self._waiters), "coalesced": self.coalesced}